@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+
+"""
+End-to-end benchmark of Xchanger against a local fake xe.com.
+
+Each scenario runs on a new Xchanger (so with a cold cache) pointed at
+benchmarks/fake_xe.py, and reports its wall time, requests per second, parse
+time per page and peak Python memory (measured in a second run under
+tracemalloc, which would otherwise slow the timed run down). The results are
+written as JSON, and a previous results file can be given to compare against.
+
+The fake server answers with a synthetic page, not a recorded xe.com one, so
+the parse and stream-fetch numbers compare Xchanger versions with each other
+rather than predict the cost of the live site.
+
+Usage:
+    python benchmarks/bench_e2e.py [--latency 0.02] [--error-rate 0] [--throttle-rps 200]
+                                   [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_xe import FakeXe  # noqa: E402
+from fx.Xchanger import Xchanger  # noqa: E402
+from fx.extractors import RateExtractor  # noqa: E402
+from fx.scheduler import RequestScheduler, RetryPolicy  # noqa: E402
+
+
+class TimedExtractor(RateExtractor):
+    """Wraps an extractor to add up the time spent parsing pages."""
+
+    def __init__(self, extractor):
+        self.extractor = extractor
+        self.pages = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def extract(self, html):
+        "Returns the rate text of the page or None if it is not found."
+        started = time.perf_counter()
+        rate = self.extractor.extract(html)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.pages += 1
+            self.seconds += elapsed
+        return rate
+
+
+def run_get(converter, args):
+    "Look up get_calls different pairs one after the other with `get`."
+    currencies = [c for c in converter.only_supported_currencies if c != "USD"]
+    for currency in currencies[: args.get_calls]:
+        converter.get(1, "USD", currency)
+
+
+def run_get_data_urls(converter, args):
+    "Fetch the rates of every supported currency against USD."
+    converter._get_data_urls(1, "USD", None)
+
+
+def run_save(extension):
+    "Returns a scenario saving the USD rates with the save_to_* writer of the extension."
+
+    def run(converter, args):
+        getattr(converter, f"save_to_{extension}")(1, "USD", None)
+
+    run.__doc__ = f"Fetch the USD rates and write them with save_to_{extension}."
+    return run
+
+
+SCENARIOS = {
+    "get": run_get,
+    "_get_data_urls": run_get_data_urls,
+    "save_to_csv": run_save("csv"),
+    "save_to_json": run_save("json"),
+    "save_to_excel": run_save("excel"),
+}
+
+
+def make_converter(server, args):
+    "Returns a new Xchanger scraping the fake server."
+    scheduler = RequestScheduler(
+        max_concurrency=args.workers,
+        retry=RetryPolicy(backoff_base=0.05, backoff_max=2),
+    )
+    return Xchanger(
+        max_workers=args.workers,
+        pool_size=args.workers,
+        scheduler=scheduler,
+        stream_fetch=args.stream_fetch,
+        base_url=server.base_url,
+    )
+
+
+def run_once(name, server, args, trace_memory=False):
+    "Run a scenario on a new Xchanger in a temporary directory and return its measures."
+    converter = make_converter(server, args)
+    extractor = TimedExtractor(converter.extractor)
+    converter.extractor = extractor
+    server.reset_stats()
+    quiet = io.StringIO()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            with contextlib.redirect_stdout(quiet), contextlib.redirect_stderr(quiet):
+                if trace_memory:
+                    tracemalloc.start()
+                started = time.perf_counter()
+                SCENARIOS[name](converter, args)
+                wall = time.perf_counter() - started
+                peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        finally:
+            if trace_memory:
+                tracemalloc.stop()
+            os.chdir(cwd)
+    stats = dict(server.stats)
+    result = {
+        "wall_s": round(wall, 4),
+        "requests": stats["requests"],
+        "requests_per_s": round(stats["requests"] / wall, 1) if wall else None,
+        "pages_parsed": extractor.pages,
+        "parse_us_per_page": (
+            round(extractor.seconds / extractor.pages * 1e6, 1)
+            if extractor.pages
+            else None
+        ),
+        "server": stats,
+    }
+    if converter.last_run_stats != None:
+        result["scheduler"] = converter.last_run_stats.as_dict()
+    if peak != None:
+        result["peak_memory_mib"] = round(peak / 2**20, 2)
+    return result
+
+
+def compare(results, baseline_path):
+    "Print the wall time of each scenario next to the one of a previous run."
+    with open(baseline_path, encoding="utf-8") as file:
+        baseline = json.load(file)["results"]
+    print(
+        f"\n{'scenario':<16}{'baseline s':>12}{'now s':>10}{'ratio':>8}",
+        file=sys.stderr,
+    )
+    for name, result in results.items():
+        before = baseline.get(name, {}).get("wall_s")
+        if before == None or "wall_s" not in result:
+            continue
+        ratio = result["wall_s"] / before if before else float("nan")
+        print(
+            f"{name:<16}{before:>12.3f}{result['wall_s']:>10.3f}{ratio:>8.2f}",
+            file=sys.stderr,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rps", type=float, default=None)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--get-calls", type=int, default=20)
+    parser.add_argument("--stream-fetch", action="store_true")
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument(
+        "--only", action="append", choices=sorted(SCENARIOS), help="repeatable"
+    )
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--compare", help="a previous JSON results file")
+    args = parser.parse_args()
+
+    results = {}
+    with FakeXe(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rps=args.throttle_rps,
+    ) as server:
+        for name in args.only or SCENARIOS:
+            print(f"Running {name}...", file=sys.stderr)
+            try:
+                results[name] = run_once(name, server, args)
+                if not args.no_memory:
+                    traced = run_once(name, server, args, trace_memory=True)
+                    results[name]["peak_memory_mib"] = traced["peak_memory_mib"]
+            except Exception as e:
+                results[name] = {"error": f"{type(e).__name__}: {e}"}
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "config": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("output", "compare", "only")
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
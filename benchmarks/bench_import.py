@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+"""
+Import-time benchmark guarding the startup budget of Xchanger.
+
+`import fx.Xchanger` is timed in fresh interpreters, and the heavy optional
+modules (pandas, numpy, BeautifulSoup, tqdm, termcolor) must not be loaded by
+it. The exit status is 1 if the median time is over the budget or one of them
+is loaded, so the script can run in CI.
+
+Usage:
+    python benchmarks/bench_import.py [--runs 7] [--budget-ms 250] [--module fx.Xchanger] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAZY_MODULES = ("pandas", "numpy", "bs4", "tqdm", "termcolor")
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def time_import(module):
+    "Import the module in a new interpreter and return its import time and the lazy modules it loaded."
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, lazy=LAZY_MODULES)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output)
+
+
+def slowest_imports(module, count=10):
+    "Returns the count modules with the highest cumulative import time, from python -X importtime."
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]) / 1000, parts[2].strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="fx.Xchanger")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=250)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    time_import(args.module)  # warm the file system and bytecode caches
+    runs = [time_import(args.module) for _ in range(args.runs)]
+    median = statistics.median(run["ms"] for run in runs)
+    loaded = sorted({name for run in runs for name in run["loaded"]})
+    result = {
+        "module": args.module,
+        "runs": args.runs,
+        "median_ms": round(median, 1),
+        "min_ms": round(min(run["ms"] for run in runs), 1),
+        "budget_ms": args.budget_ms,
+        "lazy_modules_loaded": loaded,
+        "slowest_imports_ms": [
+            [name, round(ms, 1)] for ms, name in slowest_imports(args.module)
+        ],
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(
+            f"import {args.module}: median {result['median_ms']} ms, "
+            f"min {result['min_ms']} ms (budget {args.budget_ms} ms)"
+        )
+        for name, ms in result["slowest_imports_ms"]:
+            print(f"  {ms:>8.1f} ms  {name}")
+        if loaded:
+            print(f"  loaded eagerly: {', '.join(loaded)}")
+    if median > args.budget_ms or loaded:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
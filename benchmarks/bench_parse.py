@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+"""
+Per-page parse microbenchmark of the Xchanger rate extractors.
+
+Every extractor is run over each page in benchmarks/fixtures and the best
+time per page is printed in microseconds.
+
+The pages there are synthetic, not recorded from xe.com: convert_USD_EUR.html
+mimics the size and structure of a converter page (a large styled-components
+stylesheet, a Next.js JSON blob with padded placeholder text, then the rate
+element) so the extractors have to skip a similar amount of markup. Timings on
+it show relative differences between extractors, not the exact cost of parsing
+the live page, whose layout may differ.
+
+Usage:
+    python benchmarks/bench_parse.py [--repeat 5] [--number 50]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fx.extractors import (  # noqa: E402
+    FastExtractor,
+    SoupExtractor,
+    default_extractor,
+)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+EXTRACTORS = {
+    "fast": FastExtractor(),
+    "soup (restricted)": SoupExtractor(restrict=True),
+    "soup (full)": SoupExtractor(),
+    "default": default_extractor(),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=50)
+    args = parser.parse_args()
+
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html"))):
+        with open(path, encoding="utf-8") as file:
+            page = file.read()
+        print(f"{os.path.basename(path)} ({len(page) / 1024:.0f} KiB)")
+        expected = EXTRACTORS["soup (full)"].extract(page)
+        for name, extractor in EXTRACTORS.items():
+            rate = extractor.extract(page)
+            if rate != expected:
+                raise SystemExit(f"{name} extracted {rate!r}, expected {expected!r}")
+            best = min(
+                timeit.repeat(
+                    lambda: extractor.extract(page),
+                    repeat=args.repeat,
+                    number=args.number,
+                )
+            )
+            print(f"  {name:<18} {best / args.number * 1e6:>10.1f} us/page  {rate}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+
+"""
+Local stand-in of xe.com for benchmarks and offline runs of Xchanger.
+
+Serves the synthetic converter page of benchmarks/fixtures (generated to look
+like an xe.com page, not recorded from it, see benchmarks/bench_parse.py) for
+any From/To/Amount, with the rate element rewritten to a deterministic rate of
+the pair. Latency,
+server errors and throttling (429 with Retry-After) can be configured.
+
+Usage:
+    python benchmarks/fake_xe.py [--port 8080] [--latency 0.05] [--error-rate 0.01] [--throttle-rps 50]
+
+    Xchanger(base_url="http://127.0.0.1:8080")
+"""
+
+import argparse
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+FIXTURE = os.path.join(FIXTURES_DIR, "convert_USD_EUR.html")
+
+_RATE_RE = re.compile(r'(<p class="result__BigRate[^"]*">)(.*?)(</p>)', re.S)
+
+
+def unit_value(currency):
+    "Returns a made-up but stable value of 1 unit of the currency in US dollars."
+    if currency == "USD":
+        return 1.0
+    return 0.001 + (zlib.crc32(currency.encode("ascii")) % 100000) / 50000
+
+
+def pair_rate(from_currency, to_currency):
+    "Returns the rate the server gives for 1 unit of from_currency in to_currency."
+    return unit_value(from_currency) / unit_value(to_currency)
+
+
+class FakeXe(ThreadingHTTPServer):
+    """
+    HTTP server answering /currencyconverter/convert like xe.com.
+
+    Parameters
+    ----------
+    address: tuple, optional
+        The (host, port) to listen on. Defaults to a free port of 127.0.0.1.
+
+    latency: float, optional
+        The number of seconds every response is delayed by. Defaults to 0.
+
+    jitter: float, optional
+        The maximum number of seconds randomly added to latency. Defaults to 0.
+
+    error_rate: float, optional
+        The fraction of requests answered with a 500 error. Defaults to 0.
+
+    throttle_rps: float, optional
+        The number of requests per second above which requests get a 429. Defaults to None (never).
+
+    fixture: str, optional
+        The path of the page served. Defaults to the synthetic benchmarks/fixtures/convert_USD_EUR.html.
+
+    seed: int, optional
+        The seed of the random errors and jitter. Defaults to 0.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address=("127.0.0.1", 0),
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        throttle_rps=None,
+        fixture=FIXTURE,
+        seed=0,
+    ):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rps = throttle_rps
+        self.random = random.Random(seed)
+        with open(fixture, encoding="utf-8") as file:
+            page = file.read()
+        match = _RATE_RE.search(page)
+        if match == None:
+            raise ValueError(f"{fixture} has no rate element.")
+        self._before = (page[: match.start()] + match.group(1)).encode("utf-8")
+        self._after = (match.group(3) + page[match.end() :]).encode("utf-8")
+        self._tokens = throttle_rps
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.reset_stats()
+
+    @property
+    def base_url(self):
+        "Returns the base_url to give to Xchanger."
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset_stats(self):
+        "Resets the request counters."
+        with self._lock:
+            self.stats = {
+                "requests": 0,
+                "ok": 0,
+                "errors": 0,
+                "throttled": 0,
+                "bytes_sent": 0,
+            }
+
+    def count(self, name, value=1):
+        "Increments the counter called name."
+        with self._lock:
+            self.stats[name] += value
+
+    def page(self, from_currency, to_currency, amount):
+        "Returns the converter page of the pair as bytes."
+        rate = f"{pair_rate(from_currency, to_currency) * amount:,.8f}"
+        element = (
+            f'{rate[:-2]}<span class="faded-digits">{rate[-2:]}</span> {to_currency}'
+        )
+        return self._before + element.encode("utf-8") + self._after
+
+    def decide(self):
+        "Returns the status of the next response: 200, 429 (throttled) or 500."
+        with self._lock:
+            if self.throttle_rps != None:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.throttle_rps,
+                    self._tokens + (now - self._updated_at) * self.throttle_rps,
+                )
+                self._updated_at = now
+                if self._tokens < 1:
+                    return 429
+                self._tokens -= 1
+            if self.error_rate and self.random.random() < self.error_rate:
+                return 500
+            return 200
+
+    def delay(self):
+        "Returns the number of seconds to wait before answering."
+        if not self.jitter:
+            return self.latency
+        with self._lock:
+            return self.latency + self.random.uniform(0, self.jitter)
+
+    def start(self):
+        "Serves requests from a daemon thread and returns the server."
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        "Stops serving and closes the socket."
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Answers one request of a FakeXe server."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.count("requests")
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path.rstrip("/") != "/currencyconverter/convert":
+            return self._send(404, b"Not Found")
+        try:
+            from_currency = query["From"][0].upper()
+            to_currency = query["To"][0].upper()
+            amount = float(query.get("Amount", ["1"])[0])
+        except (KeyError, ValueError):
+            return self._send(400, b"Bad Request")
+        delay = server.delay()
+        if delay:
+            time.sleep(delay)
+        status = server.decide()
+        if status == 429:
+            server.count("throttled")
+            return self._send(429, b"Too Many Requests", {"Retry-After": "1"})
+        if status == 500:
+            server.count("errors")
+            return self._send(500, b"Internal Server Error")
+        server.count("ok")
+        self._send(200, server.page(from_currency, to_currency, amount))
+
+    def _send(self, status, body, headers=None):
+        "Send a response with a body of bytes."
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            return  # the client stopped reading after the rate element
+        self.server.count("bytes_sent", len(body))
+
+    def log_message(self, format, *args):
+        "Keep the benchmark output clean."
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rps", type=float, default=None)
+    args = parser.parse_args()
+
+    server = FakeXe(
+        (args.host, args.port),
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rps=args.throttle_rps,
+    )
+    print(f"Serving a fake xe.com on {server.base_url} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
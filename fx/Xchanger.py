@@ -3,17 +3,40 @@
 # > Importing modules
 
 import requests
-import requests_cache
-from bs4 import BeautifulSoup
-import pandas as pd
+from requests.adapters import HTTPAdapter
+from fx._lazy import LazyModule, colored
+from fx.cache import RateCache
+from fx.checkpoint import Checkpoint
+from fx.currencies import CURRENCY_INDEX, SUPPORTED_CURRENCIES
 from fx.erros import XchangerException
+from fx.extractors import (
+    RateElementScanner,
+    default_extractor,
+    extract_batch,
+    format_rate,
+    parse_rate,
+)
+from fx.instrumentation import Instrumentation
+from fx.refresher import BackgroundRefresher
+from fx.results import RateResult, RateTable
+from fx.scheduler import RequestScheduler
+from fx.singleflight import SingleFlight
+from fx.snapshot import SnapshotWriter
+from fx.sources import HedgedFetcher, XeSource
 import os
-import tqdm
-from termcolor import colored
 import itertools
 import threading
 import sys
 import time
+from decimal import Decimal
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+
+# only loaded by the features that need them, so importing this module stays fast
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+tqdm = LazyModule("tqdm")
 
 
 class Xchanger:
@@ -32,8 +55,93 @@ class Xchanger:
     to_currency: str, optional
         The to_currency parameter is the currency being exchanged to.
 
-    proxies: str, optional
-        The proxies parameter is a string that represents the proxy to use when making requests to the XE API.
+    proxies: dict, optional
+        The proxies parameter is the requests-style mapping of scheme to proxy URL used when making requests
+        to the XE API, for example {"http": "http://host:3128", "https": "http://host:3128"}.
+
+    max_workers: int, optional
+        The max_workers parameter is the maximum number of URLs fetched concurrently when saving data to a file.
+        The max_workers parameter is optional and defaults to 16.
+
+    pool_size: int, optional
+        The pool_size parameter is the number of keep-alive connections kept open to each host.
+        The pool_size parameter is optional and defaults to 16.
+
+    proxy_check_ttl: int, optional
+        The proxy_check_ttl parameter is the number of seconds a successful proxy check is reused for.
+        The proxy_check_ttl parameter is optional and defaults to 300.
+
+    extractor: RateExtractor, optional
+        The extractor parameter is the object that reads the rate out of a xe.com page.
+        The extractor parameter is optional and defaults to a fast scanner that falls back to BeautifulSoup.
+
+    decimal: bool, optional
+        The decimal parameter makes the amount be applied to the rate with decimal.Decimal instead of float.
+        The decimal parameter is optional and defaults to False.
+
+    cache_ttl: int, optional
+        The cache_ttl parameter is the number of seconds a rate returned by `get` is kept in memory.
+        The cache_ttl parameter is optional and defaults to 3600.
+
+    cache_size: int, optional
+        The cache_size parameter is the maximum number of currency pairs kept in memory.
+        The cache_size parameter is optional and defaults to 1024.
+
+    cache_backend: CacheBackend, optional
+        The cache_backend parameter is the store of the cached rates, for example fx.cache.SQLiteBackend("rates.sqlite").
+        The cache_backend parameter is optional and defaults to an in-memory store of cache_size pairs.
+
+    parse_workers: int, optional
+        The parse_workers parameter is the number of processes the pages of a bulk run are parsed in.
+        The parse_workers parameter is optional and defaults to None, parsing the pages in the fetching threads.
+
+    parse_batch_size: int, optional
+        The parse_batch_size parameter is the number of pages handed to a parse process at once.
+        The parse_batch_size parameter is optional and defaults to 16.
+
+    scheduler: RequestScheduler, optional
+        The scheduler parameter rate limits, retries and adapts the concurrency of the requests to xe.com.
+        The scheduler parameter is optional and defaults to fx.scheduler.RequestScheduler(max_concurrency=max_workers).
+
+    checkpoint_dir: str, optional
+        The checkpoint_dir parameter is the directory bulk runs record their progress in, so a rerun
+        of a failed run only fetches the currencies it is missing.
+        The checkpoint_dir parameter is optional and defaults to None (no checkpoints).
+
+    stream_fetch: bool, optional
+        The stream_fetch parameter makes every page be downloaded in chunks and the download stop
+        as soon as the rate element has arrived, instead of reading the whole page. The rest of the
+        page is not transferred, but the connection it came on is closed rather than reused.
+        The stream_fetch parameter is optional and defaults to False.
+
+    base_url: str, optional
+        The base_url parameter is the site the rates are scraped from, for example a local stand-in
+        of xe.com such as the one in benchmarks/fake_xe.py.
+        The base_url parameter is optional and defaults to "https://www.xe.com".
+
+    instrumentation: Instrumentation, optional
+        The instrumentation parameter receives the timings of each stage (proxy check, cache lookup,
+        HTTP, parsing, DataFrame building, file writing) and the request, cache and parse counters,
+        for example an fx.instrumentation.Metrics that exports them as Prometheus text or JSON.
+        The instrumentation parameter is optional and defaults to hooks that do nothing.
+
+    history: RateHistory, optional
+        The history parameter records every rate scraped with the time it was scraped, for example
+        fx.history.RateHistory("history.sqlite"), which answers (pair, time range) queries.
+        The history parameter is optional and defaults to None (no history).
+
+    sources: list, optional
+        The sources parameter is the list of fx.sources.RateSource the rate of a single pair is read from,
+        the primary one first, for example [XeSource(), FileSource("rates.json")]. An XeSource without
+        an Xchanger scrapes xe.com with this one. It only applies to `get` and `get_rates`, bulk runs
+        always scrape xe.com.
+        The sources parameter is optional and defaults to None, scraping xe.com without hedging unless hedge is given.
+
+    hedge: HedgePolicy, optional
+        The hedge parameter is the fx.sources.HedgePolicy deciding when a backup request is sent to the
+        next source (or again to xe.com) once the primary source is slower than a percentile of its
+        recorded latencies. The first rate to arrive is used.
+        The hedge parameter is optional and defaults to None, or to HedgePolicy() if sources are given.
 
     Returns
     -------
@@ -42,239 +150,102 @@ class Xchanger:
 
     Note:
     ----
-        This module may create a file named url_cache.sqlite to store the cache of the requests.
-        The cache will expire after 1 hour (3600 seconds).
-        To clear the cache, you can delete the `url_cache.sqlite` file (NOT RECOMMENDED).
+        The rates scraped by this module are cached by the Xchanger object, in memory unless
+        another cache_backend (SQLiteBackend or FileBackend from fx.cache) is given.
+        The cache will expire after 1 hour (3600 seconds) unless cache_ttl says otherwise.
+        Only the rate of 1 unit is scraped and cached, the amount is applied locally.
+        `start_refresher` keeps the most requested pairs fresh in the background.
+        One instance can be shared by many threads: the arguments of `get` only apply to that call,
+        and concurrent lookups of the same pair share a single request to xe.com.
 
     """
 
-    def __init__(self, amount=1, from_currency="USD", to_currency="PKR", proxies=None):
+    stream_chunk_size = 16 * 1024
+
+    def __init__(
+        self,
+        amount=1,
+        from_currency="USD",
+        to_currency="PKR",
+        proxies=None,
+        max_workers=16,
+        pool_size=16,
+        proxy_check_ttl=300,
+        extractor=None,
+        decimal=False,
+        cache_ttl=3600,
+        cache_size=1024,
+        cache_backend=None,
+        parse_workers=None,
+        parse_batch_size=16,
+        scheduler=None,
+        checkpoint_dir=None,
+        stream_fetch=False,
+        base_url="https://www.xe.com",
+        instrumentation=None,
+        history=None,
+        sources=None,
+        hedge=None,
+    ):
+        if max_workers < 1:
+            raise XchangerException("max_workers must be a positive integer.")
+        if pool_size < 1:
+            raise XchangerException("pool_size must be a positive integer.")
+        if parse_workers != None and parse_workers < 1:
+            raise XchangerException("parse_workers must be a positive integer or None.")
+        if parse_batch_size < 1:
+            raise XchangerException("parse_batch_size must be a positive integer.")
+        if proxies != None and not isinstance(proxies, dict):
+            raise XchangerException(
+                'proxies must be a dict such as {"http": "http://host:3128", "https": "http://host:3128"}.'
+            )
         self.amount = amount
         self.from_currency = from_currency
         self.to_currency = to_currency
         self.proxies = proxies
-        self.url = (
-            "https://www.xe.com/currencyconverter/convert/?Amount=1&From=USD&To=PKR"
+        self.max_workers = max_workers
+        self.pool_size = pool_size
+        self.proxy_check_ttl = proxy_check_ttl
+        self.extractor = extractor if extractor != None else default_extractor()
+        self.decimal = decimal
+        self.parse_workers = parse_workers
+        self.parse_batch_size = parse_batch_size
+        self.scheduler = (
+            scheduler
+            if scheduler != None
+            else RequestScheduler(max_concurrency=max_workers)
         )
-        self._animation_done = False
-        self.only_supported_currencies = [
-            "USD",
-            "EUR",
-            "GBP",
-            "CAD",
-            "AUD",
-            "JPY",
-            "INR",
-            "NZD",
-            "CHF",
-            "ZAR",
-            "RUB",
-            "BGN",
-            "SGD",
-            "HKD",
-            "SEK",
-            "THB",
-            "HUF",
-            "CNY",
-            "NOK",
-            "MXN",
-            "DKK",
-            "MYR",
-            "PLN",
-            "BRL",
-            "PHP",
-            "IDR",
-            "CZK",
-            "AED",
-            "TWD",
-            "KRW",
-            "ILS",
-            "ARS",
-            "CLP",
-            "EGP",
-            "TRY",
-            "RON",
-            "SAR",
-            "PKR",
-            "COP",
-            "IQD",
-            "XAU",
-            "FJD",
-            "KWD",
-            "BAM",
-            "ISK",
-            "MAD",
-            "HRK",
-            "VND",
-            "JMD",
-            "JOD",
-            "DOP",
-            "PEN",
-            "CRC",
-            "BHD",
-            "BDT",
-            "DZD",
-            "KES",
-            "XAG",
-            "LKR",
-            "OMR",
-            "QAR",
-            "XOF",
-            "IRR",
-            "XCD",
-            "TND",
-            "TTD",
-            "XPF",
-            "EEK",
-            "ZMK",
-            "ZMW",
-            "BBD",
-            "NGN",
-            "LBP",
-            "XAF",
-            "MUR",
-            "XPT",
-            "BSD",
-            "ALL",
-            "UYU",
-            "BMD",
-            "LVL",
-            "UAH",
-            "GTQ",
-            "XDR",
-            "BWP",
-            "BOB",
-            "CUP",
-            "PYG",
-            "HNL",
-            "LTL",
-            "ZWD",
-            "NIO",
-            "RSD",
-            "NPR",
-            "HTG",
-            "PAB",
-            "SVC",
-            "GYD",
-            "KYD",
-            "TZS",
-            "CNH",
-            "CVE",
-            "FKP",
-            "ANG",
-            "UGX",
-            "MGA",
-            "GEL",
-            "ETB",
-            "MDL",
-            "VUV",
-            "SYP",
-            "BND",
-            "KHR",
-            "NAD",
-            "MKD",
-            "AOA",
-            "PGK",
-            "MMK",
-            "KZT",
-            "MOP",
-            "MZN",
-            "LYD",
-            "SLE",
-            "SLL",
-            "GNF",
-            "BYN",
-            "BYR",
-            "GMD",
-            "AWG",
-            "AMD",
-            "YER",
-            "LAK",
-            "WST",
-            "MWK",
-            "KPW",
-            "BIF",
-            "DJF",
-            "MNT",
-            "UZS",
-            "TOP",
-            "SCR",
-            "KGS",
-            "BTN",
-            "SBD",
-            "GIP",
-            "RWF",
-            "CDF",
-            "MVR",
-            "MRU",
-            "ERN",
-            "SOS",
-            "SZL",
-            "TJS",
-            "LRD",
-            "LSL",
-            "SHP",
-            "STN",
-            "KMF",
-            "SPL",
-            "TMT",
-            "SRD",
-            "IMP",
-            "JEP",
-            "TVD",
-            "GGP",
-            "AFN",
-            "AZN",
-            "BZD",
-            "CUC",
-            "GHS",
-            "SDG",
-            "VES",
-            "VEF",
-            "XPD",
-            "BTC",
-            "ADA",
-            "BCH",
-            "DOGE",
-            "DOT",
-            "ETH",
-            "LINK",
-            "LTC",
-            "LUNA",
-            "UNI" "",
-            "XLM",
-            "XRP",
-            "ATS",
-            "AZM",
-            "BEF",
-            "CYP",
-            "DEM",
-            "ESP",
-            "FIM",
-            "FRF",
-            "GHC",
-            "GRD",
-            "IEP",
-            "ITL",
-            "LUF",
-            "MGF",
-            "MRO",
-            "MTL",
-            "MZM",
-            "NLG",
-            "PTE",
-            "ROL",
-            "SDD",
-            "SIT",
-            "SKK",
-            "SRG",
-            "STD",
-            "TMM",
-            "TRL",
-            "VAL",
-            "VEB",
-            "XEU",
-        ]
+        self.last_run_stats = None
+        self.checkpoint_dir = checkpoint_dir
+        self.stream_fetch = stream_fetch
+        self.base_url = base_url.rstrip("/")
+        self.instrumentation = (
+            instrumentation if instrumentation != None else Instrumentation()
+        )
+        self.rate_cache = RateCache(
+            ttl=cache_ttl, maxsize=cache_size, backend=cache_backend, decimal=decimal
+        )
+        self.refresher = None
+        self.history = history
+        self._snapshot_writers = {}
+        self.fetcher = None
+        if sources != None or hedge != None:
+            sources = list(sources) if sources != None else [XeSource()]
+            for source in sources:
+                if isinstance(source, XeSource) and source.xchanger == None:
+                    source.xchanger = self
+            self.fetcher = HedgedFetcher(
+                sources,
+                hedge,
+                max_workers=max_workers * 2,
+                instrumentation=self.instrumentation,
+            )
+        self._proxy_checks = {}
+        self._proxy_lock = threading.Lock()
+        self._session = self._making_session()
+        self._flights = SingleFlight()
+        self.url = self._making_url()
+        self.only_supported_currencies = SUPPORTED_CURRENCIES
 
     def _is_proxy(self, proxies):
         "Checks if the class proxy attribute is None or not."
@@ -283,44 +254,62 @@ class Xchanger:
         else:
             return False
 
+    def _making_session(self):
+        "Create a keep-alive HTTP session with a connection pool of pool_size."
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size, pool_maxsize=self.pool_size
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
     def _check_proxies(self, proxies, get_name=False):
-        "Checks is the proxy works or not"
+        "Checks is the proxy works or not, reusing a successful check for proxy_check_ttl seconds"
         if self._is_proxy(proxies):
-            try:
-                responce = requests.get(
-                    "https://api.ipify.org?format=json", proxies=proxies
+            key = tuple(sorted(proxies.items()))
+            with self._proxy_lock:
+                checked = self._proxy_checks.get(key)
+                if (
+                    checked == None
+                    or time.monotonic() - checked[1] > self.proxy_check_ttl
+                ):
+                    with self.instrumentation.span("proxy_check"):
+                        checked = (self._ask_proxy_ip(proxies), time.monotonic())
+                    self._proxy_checks[key] = checked
+            if get_name:
+                message = f"Your Public IP Address is {checked[0]}"
+                return [True, message]
+            else:
+                return True
+
+    def _ask_proxy_ip(self, proxies):
+        "Send one request through the proxy and return the public IP it reports."
+        try:
+            responce = self._session.get(
+                "https://api.ipify.org?format=json", proxies=proxies
+            )
+            if responce.status_code == 200:
+                return responce.text
+            else:
+                raise XchangerException(
+                    f"Your Proxy is not wroking! Status code : {responce.status_code}"
                 )
-                if responce.status_code == 200:
-                    if get_name:
-                        message = f"Your Public IP Address is {responce.text}"
-                        return [True, message]
-                    else:
-                        return True
-                else:
-                    raise XchangerException(
-                        f"Your Proxy is not wroking! Status code : {responce.status_code}"
-                    )
-            except Exception as e:
-                raise XchangerException(f"Fail to check the proxy. Error : {e}")
+        except Exception as e:
+            raise XchangerException(f"Fail to check the proxy. Error : {e}")
 
     def _making_url(self):
-        "Get the URL of the given currencies."
-        if (
-            self.amount == 1
-            and self.from_currency == "USD"
-            and self.to_currency == "PKR"
-        ):
-            new_url = self.url
+        "Get the URL of the rate of 1 unit of the default currencies of the instance."
+        return self._making_pair_url(self.from_currency, self.to_currency)
 
-        else:
-            new_url = f"https://www.xe.com/currencyconverter/convert/?Amount={self.amount}&From={self.from_currency}&To={self.to_currency}"
+    def _making_pair_url(self, from_currency, to_currency):
+        "Get the URL of the rate of 1 unit of from_currency in to_currency."
+        return f"{self.base_url}/currencyconverter/convert/?Amount=1&From={from_currency}&To={to_currency}"
 
-        return new_url
-
-    def _animation(self):
-        "Create a simple animation"
+    def _animation(self, done):
+        "Create a simple animation until the done event is set"
         for char in itertools.cycle(["| ", "/ ", "- ", "\\ "]):
-            if self._animation_done:
+            if done.is_set():
                 break
             sys.stdout.write(
                 colored(
@@ -330,17 +319,15 @@ class Xchanger:
                 + colored(char, "green")
             )
             sys.stdout.flush()
-            time.sleep(0.1)
+            done.wait(0.1)
         sys.stdout.write(colored("\rDone!     ", "blue"))
 
-    def _making_requests(self):
+    def _making_requests(self, url, proxies=None):
         "Make requests to scrap data"
-        self.url = self._making_url()
         try:
-            if self._check_proxies(self.proxies):
-                responce = requests.get(self.url, self.proxies)
-            else:
-                responce = requests.get(self.url)
+            responce = self._scheduled_get(url, proxies)
+            if responce == None:
+                raise XchangerException("No response from xe.com.")
             if responce.status_code == 200:
                 return responce
             else:
@@ -352,78 +339,257 @@ class Xchanger:
                 f"The data you provided is incorrect. The only currencies supported by this module are: {self.only_supported_currencies}"
             )
 
-    def _get_data(self):
+    def _get_data(self, from_currency, to_currency, proxies=None):
         "Scrapping data from different currencies"
-        responce = self._making_requests()
+        responce = self._making_requests(
+            self._making_pair_url(from_currency, to_currency), proxies
+        )
         try:
-            main_soup = BeautifulSoup(responce.text, "lxml")
-            xchange_rate_to_2_from = main_soup.find(
-                "p", class_="result__BigRate-sc-1bsijpp-1 iGrAod"
-            ).text.split(" ")[0]
+            xchange_rate_to_2_from = self._extract(self._read_page(responce))
+            if xchange_rate_to_2_from == None:
+                raise XchangerException("The rate was not found in the page.")
             return xchange_rate_to_2_from
 
         except Exception as e:
             raise XchangerException(f"Fail to make the soup. Error : {e}")
 
     def get(self, amount=1, from_currency="USD", to_currency="PKR", proxies=None):
-        "Returns the data of the specified currencies."
-        self.amount = amount
-        self.from_currency = from_currency
-        self.to_currency = to_currency
-        self.proxies = proxies
+        """
+        Returns the data of the specified currencies.
+
+        The arguments only apply to this call, so one instance can be shared by many
+        threads. Concurrent calls for the same pair share a single request to xe.com.
+        proxies defaults to the proxies given to the constructor.
+        """
+        pair = (from_currency, to_currency)
         try:
-            print(colored("\nStarting Xchanger...", "green"))
-            t = threading.Thread(target=self._animation, daemon=True)
-            t.start()
-            rate = self._get_data()
-            rate_text = (
-                f"{self.amount} {self.from_currency} = {rate} {self.to_currency}"
-            )
-            self._animation_done = True
-            time.sleep(0.8)
-            print("\n")
+            entry, stale = self._lookup_rate(pair)
+            rate = None if entry == None else entry[0]
+            if rate == None:
+                print(colored("\nStarting Xchanger...", "green"))
+                done = threading.Event()
+                t = threading.Thread(target=self._animation, args=(done,), daemon=True)
+                t.start()
+                try:
+                    rate = self._fetch_pair_rate(pair, proxies).rate
+                finally:
+                    done.set()
+                    t.join()
+                if rate == None:
+                    raise XchangerException(
+                        f"No rate was found for {from_currency} to {to_currency}."
+                    )
+                self._flush_rates()
+                print("\n")
+            rate = self._apply_amount(rate, amount)
+            rate_text = f"{amount} {from_currency} = {rate} {to_currency}"
+            if stale:
+                rate_text += " (stale)"
             return colored(rate_text, "blue")
         except Exception as e:
             raise XchangerException(f"Fail to get data. Error : {e}")
 
+    def get_rates(self, pairs):
+        """
+        Returns the rates of 1 unit of many currency pairs, without printing, sleeping or animating.
+
+        Repeated pairs are fetched once, cached pairs are not fetched at all and the
+        missing ones are fetched concurrently through the bulk worker pool.
+
+        Args:
+            pairs: An iterable of (from_currency, to_currency) tuples.
+
+        Returns:
+            A list of RateResult, one per distinct pair, in the order the pairs were first given.
+        """
+        unique_pairs, results, missing_pairs = self._split_cached_pairs(pairs)
+        if len(missing_pairs) == 1:
+            results[missing_pairs[0]] = self._fetch_pair_rate(missing_pairs[0])
+        elif missing_pairs:
+            workers = min(self.max_workers, len(missing_pairs))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for result in executor.map(self._fetch_pair_rate, missing_pairs):
+                    results[result.pair] = result
+        if missing_pairs:
+            self._flush_rates()
+        return [results[pair] for pair in unique_pairs]
+
+    def _split_cached_pairs(self, pairs):
+        "Dedupe and check the pairs, returning them with the cached results and the pairs still missing."
+        unique_pairs = list(dict.fromkeys(tuple(pair) for pair in pairs))
+        for pair in unique_pairs:
+            self._check_currencies(*pair)
+        results = {}
+        missing_pairs = []
+        for pair in unique_pairs:
+            entry, stale = self._lookup_rate(pair)
+            if entry != None:
+                results[pair] = RateResult(pair, entry[0], entry[1], "cache", stale)
+            else:
+                missing_pairs.append(pair)
+        return unique_pairs, results, missing_pairs
+
+    def _lookup_rate(self, pair):
+        "Look the pair up in the rate cache, serving an expired rate while the refresher renews it."
+        refresher = self.refresher
+        refreshing = refresher != None and refresher.running
+        with self.instrumentation.span("cache_lookup"):
+            entry = self.rate_cache.lookup(*pair, allow_stale=refreshing)
+        stale = refreshing and entry != None and self.rate_cache.is_stale(entry[1])
+        if stale and refresher.is_too_stale(entry[1]):
+            entry = None  # too old to serve, scrape it again now
+            stale = False
+        self.instrumentation.count("cache_hits" if entry != None else "cache_misses")
+        if not refreshing:
+            return entry, False
+        refresher.record(pair)
+        if stale:
+            refresher.request_refresh(pair)
+        return entry, stale
+
+    def start_refresher(self, interval=60, top_n=32, refresh_ahead=0.8, max_stale=None):
+        """
+        Starts refreshing the most requested pairs in the background (stale-while-revalidate).
+
+        While it runs, `get`, `get_rates` and `AsyncXchanger.aget_many` answer the hot pairs
+        from memory. An expired rate is still returned, flagged as stale, and scraped again
+        right away in the background, unless it expired more than max_stale seconds ago.
+
+        Args:
+            interval: The number of seconds between two refreshes.
+            top_n: The number of most requested pairs kept fresh.
+            refresh_ahead: The fraction of cache_ttl after which a hot pair is refreshed.
+            max_stale: The most seconds past its expiry a rate is served stale for. Defaults to cache_ttl.
+
+        Returns:
+            The running fx.refresher.BackgroundRefresher.
+        """
+        self.stop_refresher()
+        self.refresher = BackgroundRefresher(
+            self, interval, top_n, refresh_ahead, max_stale
+        )
+        self.refresher.start()
+        return self.refresher
+
+    def stop_refresher(self, timeout=None):
+        "Stops the background refresher if it runs, waiting up to timeout seconds for it."
+        if self.refresher != None:
+            self.refresher.stop(timeout)
+            self.refresher = None
+
+    def _fetch_pair_rate(self, pair, proxies=None, refresh=False):
+        """
+        Scrape the unit rate of one pair, cache it and wrap it in a RateResult, sharing a fetch in flight.
+
+        `get`, `get_rates`, the refresher and the rate server all go through it, so concurrent
+        lookups of a pair share one request whichever of them started it. Unless refresh is set,
+        a rate cached since the caller missed it is returned instead of scraping again.
+        """
+        return self._flights.do(
+            ("rate", pair), partial(self._scrape_pair_rate, pair, proxies, refresh)
+        )
+
+    def _scrape_pair_rate(self, pair, proxies=None, refresh=False):
+        "Scrape the unit rate of one pair, cache it and wrap it in a RateResult."
+        if not refresh:
+            entry = self.rate_cache.lookup(*pair)
+            if entry != None:  # a flight that just landed cached it
+                return RateResult(pair, entry[0], entry[1], "cache")
+        if self.fetcher == None:
+            rate = self._fetch_rate(self._making_pair_url(*pair), proxies)
+            return RateResult(pair, self._cache_rate(pair, rate), time.time(), "xe.com")
+        try:
+            rate, source = self.fetcher.fetch(*pair, proxies=proxies)
+        except XchangerException:
+            rate, source = "None", self.fetcher.sources[0].name
+        return RateResult(pair, self._cache_rate(pair, rate), time.time(), source)
+
+    def _cache_rate(self, pair, rate):
+        "Parse the rate text of a pair and store it in the rate cache, returning the number or None."
+        if rate == "None":
+            return None
+        try:
+            rate = parse_rate(rate, decimal=self.decimal)
+        except (ArithmeticError, ValueError):
+            return None
+        self._store_rate(pair, rate)
+        return rate
+
+    def _store_rate(self, pair, rate):
+        "Store a freshly scraped unit rate in the rate cache and the history."
+        self.rate_cache.set(*pair, rate)
+        if self.history != None:
+            self.history.append(*pair, rate)
+
+    def _flush_rates(self):
+        "Write the pending rates of the rate cache and the history to their storage."
+        self.rate_cache.flush()
+        if self.history != None:
+            self.history.flush()
+
     def _get_data_urls(self, amount, from_currency, to_currency):
         "Get data from the different URLs of the currencies."
-        if (
-            from_currency != None
-            and from_currency not in self.only_supported_currencies
-        ):
-            raise XchangerException(
-                f"The data you provided is incorrect. The only currencies supported by this module are: {self.only_supported_currencies}"
-            )
+        rates = dict(self._iter_rates(from_currency, to_currency))
+        return [
+            self._apply_amount(rates[currency], amount)
+            for currency in self.only_supported_currencies
+        ]
 
-        if to_currency != None and to_currency not in self.only_supported_currencies:
+    def _apply_amount(self, rate, amount):
+        "Multiply a unit rate (text or number) by the amount, keeping the None sentinel."
+        if rate == "None":
+            return rate
+        if isinstance(rate, str):
+            if amount == 1:
+                return rate
+            rate = parse_rate(rate, decimal=self.decimal)
+        if self.decimal:
+            return str(Decimal(rate) * Decimal(str(amount)))
+        return format_rate(float(rate) * float(amount))
+
+    def _check_currencies(self, *currencies):
+        "Raise if one of the given currencies is not supported, None is allowed."
+        for currency in currencies:
+            if currency != None and currency not in CURRENCY_INDEX:
+                raise XchangerException(
+                    f"The data you provided is incorrect. The only currencies supported by this module are: {self.only_supported_currencies}"
+                )
+
+    def _check_bulk_currencies(self, from_currency, to_currency):
+        "Raise unless exactly one supported currency is given for a bulk run."
+        self._check_currencies(from_currency, to_currency)
+        if (from_currency == None) == (to_currency == None):
             raise XchangerException(
-                f"The data you provided is incorrect. The only currencies supported by this module are: {self.only_supported_currencies}"
+                "Specify one currency at a time. If only one currency is given, the other currency must be None."
             )
 
-        else:
-            if (from_currency != None and to_currency == None) or (
-                from_currency == None and to_currency != None
-            ):
-                url_list = self._making_url_list(amount, from_currency, to_currency)
-                responce_url_list = self._making_requests_urls(url_list)
-                data = self._data_urls(responce_url_list)
-                return data
+    def _bulk_pair(self, currency, from_currency, to_currency):
+        "Get the (from, to) pair of one row of a bulk run."
+        if from_currency == None:
+            return (currency, to_currency)
+        return (from_currency, currency)
 
-            else:
-                raise XchangerException(
-                    "Specify one currency at a time. If only one currency is given, the other currency must be None."
-                )
+    def _iter_rates(self, from_currency, to_currency, currencies=None, progress=True):
+        "Check the currencies and return a stream of (currency, rate) rows."
+        self._check_bulk_currencies(from_currency, to_currency)
+        if currencies == None:
+            currencies = self.only_supported_currencies
+        url_list = self._making_url_list(from_currency, to_currency, currencies)
+        return self._stream_rates(
+            url_list, from_currency, to_currency, currencies, progress
+        )
 
     def _making_url_list(
-        self, amount: int, from_currency: str, to_currency: str | None
+        self, from_currency: str | None, to_currency: str | None, currencies=None
     ):
-        "Create a list of the different URLs of the currencies."
+        "Create a list of the URLs of the rates of 1 unit of the different currencies."
         url_list = []
-        for country_code in self.only_supported_currencies:
+        if currencies == None:
+            currencies = self.only_supported_currencies
+        for country_code in currencies:
             if from_currency == None:
                 try:
-                    new_url = f"https://www.xe.com/currencyconverter/convert/?Amount={amount}&From={country_code}&To={to_currency}"
+                    new_url = self._making_pair_url(country_code, to_currency)
                     url_list.append(new_url)
                 except Exception as e:
                     raise XchangerException(
@@ -432,7 +598,7 @@ class Xchanger:
 
             elif to_currency == None:
                 try:
-                    new_url = f"https://www.xe.com/currencyconverter/convert/?Amount={amount}&From={from_currency}&To={country_code}"
+                    new_url = self._making_pair_url(from_currency, country_code)
                     url_list.append(new_url)
                 except Exception as e:
                     raise XchangerException(
@@ -440,37 +606,204 @@ class Xchanger:
                     )
         return url_list
 
+    def _fetch_url(self, url: str, proxies=None):
+        "Fetch one URL of a bulk run and return its HTML, or the string None once its retries are used up."
+        responce = self._scheduled_get(url, proxies)
+        if responce != None and responce.status_code == 200:
+            try:
+                return self._read_page(responce)
+            except requests.RequestException:
+                return "None"
+        if responce != None:
+            responce.close()
+        return "None"
+
+    def _scheduled_get(self, url: str, proxies=None):
+        "Send a GET request through the scheduler, returning None if every attempt failed."
+        if proxies == None:
+            proxies = self.proxies
+        proxies = proxies if self._check_proxies(proxies) else None
+        instrumentation = self.instrumentation
+        attempts = []
+
+        def send():
+            attempts.append(url)
+            instrumentation.count("requests")
+            try:
+                with instrumentation.span("http"):
+                    responce = self._session.get(
+                        url, proxies=proxies, stream=self.stream_fetch
+                    )
+            except requests.RequestException:
+                instrumentation.count("http_errors")
+                raise
+            if responce.status_code in self.scheduler.throttle_statuses:
+                instrumentation.count("throttled")
+            elif responce.status_code >= 400:
+                instrumentation.count("http_errors")
+            return responce
+
+        responce = self.scheduler.request(send)
+        if len(attempts) > 1:
+            instrumentation.count("retries", len(attempts) - 1)
+        return responce
+
+    def _extract(self, html):
+        "Read the rate text out of a page, timing the parse and counting the pages without a rate."
+        with self.instrumentation.span("parse"):
+            xchange_rate = self.extractor.extract(html)
+        if xchange_rate == None:
+            self.instrumentation.count("parse_misses")
+        return xchange_rate
+
+    def _read_page(self, responce):
+        "Read the page of a response, up to the end of the rate element only when stream_fetch is on."
+        if not self.stream_fetch:
+            return responce.text
+        scanner = RateElementScanner()
+        try:
+            for chunk in responce.iter_content(chunk_size=self.stream_chunk_size):
+                if scanner.feed(chunk):
+                    break
+        finally:
+            responce.close()
+        return scanner.page(responce.encoding)
+
+    def _report_run_stats(self):
+        "Print the retries and throttling of the last bulk run, if there were any."
+        stats = self.last_run_stats
+        if stats != None and (stats.retries or stats.throttled or stats.failures):
+            print(
+                colored(
+                    f"\n{stats.requests} requests, {stats.retries} retries, "
+                    f"{stats.throttled} throttled, {stats.failures} failed",
+                    "yellow",
+                )
+            )
+
+    def _fetch_rate(self, url: str, proxies=None):
+        "Fetch and parse one URL of a bulk run, keeping only its rate text."
+        try:
+            html = self._fetch_url(url, proxies)
+            if html == "None":
+                return "None"
+            xchange_rate = self._extract(html)
+        except XchangerException:
+            raise
+        except Exception as e:
+            raise XchangerException(f"Fail to get data. Error : {e}.")
+        return xchange_rate if xchange_rate != None else "None"
+
+    def _stream_rates(
+        self, url_list: list, from_currency, to_currency, currencies=None, progress=True
+    ):
+        "Yield (currency, rate) rows from the rate cache or as soon as each URL is fetched and parsed, drawing a progress bar unless progress is False."
+        if currencies == None:
+            currencies = self.only_supported_currencies
+        self.last_run_stats = self.scheduler.start_run()
+        if progress:
+            print("")
+        with tqdm.tqdm(
+            total=len(url_list),
+            desc="Fetching rates",
+            colour="green",
+            disable=not progress,
+        ) as pbar, ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            cached_rows = []
+            futures = {}
+            for currency, url in zip(currencies, url_list):
+                pair = self._bulk_pair(currency, from_currency, to_currency)
+                with self.instrumentation.span("cache_lookup"):
+                    rate = self.rate_cache.get(*pair)
+                self.instrumentation.count(
+                    "cache_hits" if rate != None else "cache_misses"
+                )
+                if rate != None:
+                    cached_rows.append((currency, rate))
+                elif self.parse_workers != None:
+                    futures[executor.submit(self._fetch_url, url)] = (currency, pair)
+                else:
+                    # the pages are parsed in the workers, so no HTML outlives its request
+                    futures[executor.submit(self._fetch_rate, url)] = (currency, pair)
+            try:
+                for row in cached_rows:
+                    pbar.update(1)
+                    yield row
+                if self.parse_workers != None:
+                    rows = self._parse_in_processes(futures)
+                else:
+                    rows = (
+                        (futures[future], future.result())
+                        for future in as_completed(futures)
+                    )
+                for (currency, pair), rate in rows:
+                    pbar.update(1)
+                    self._cache_rate(pair, rate)
+                    yield currency, rate
+            finally:
+                for future in futures:
+                    future.cancel()
+                self._flush_rates()
+        if progress:
+            self._report_run_stats()
+
+    def _parse_in_processes(self, futures):
+        "Hand the fetched pages to the parse processes in batches, yielding ((currency, pair), rate) rows."
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.parse_workers
+        ) as parse_executor:
+            parse_futures = {}
+            batch = []
+            for done, future in enumerate(as_completed(futures), start=1):
+                batch.append((futures[future], future.result()))
+                if len(batch) == self.parse_batch_size or done == len(futures):
+                    # parsing of a full batch overlaps with the requests still in flight
+                    parse_future = parse_executor.submit(
+                        extract_batch, self.extractor, [page for _, page in batch]
+                    )
+                    parse_futures[parse_future] = [key for key, _ in batch]
+                    batch = []
+            for parse_future in as_completed(parse_futures):
+                yield from zip(parse_futures[parse_future], parse_future.result())
+
     def _making_requests_urls(self, url_list: list):
-        "Make requests to the different URLs to scrape data"
-        responce_url_list = []
-        module_dir = os.path.dirname(os.path.abspath(__file__))
-        cache_file_path = os.path.join(module_dir, "url_cache.sqlite")
-        requests_cache.install_cache(cache_file_path, expire_after=3600)
+        "Make concurrent requests to the different URLs to scrape data"
+        with self.instrumentation.span("fetch_all"):
+            return self._fetch_all_urls(url_list)
+
+    def _fetch_all_urls(self, url_list: list):
+        "Fetch the pages of the different URLs concurrently, keeping their order."
+        responce_url_list = ["None"] * len(url_list)
+        self.last_run_stats = self.scheduler.start_run()
         print("")
         with tqdm.tqdm(
             total=len(url_list), desc="Fetching URLs", colour="green"
-        ) as pbar:  # simple animation
-            for url in url_list:
-                try:
-                    if self._check_proxies(self.proxies):
-                        responce = requests.get(url, self.proxies)
-                        pbar.update(1)
-                    else:
-                        responce = requests.get(url)
-                        pbar.update(1)
-                    if responce.status_code == 200:
-                        responce_url_list.append(responce.text)
-                    else:
-                        responce_url_list.append("None")
-
-                except Exception as e:
-                    raise XchangerException(
-                        f"The data you provided is incorrect. The only currencies supported by this module are: {self.only_supported_currencies}. Error : {e} from {url}"
-                    )
+        ) as pbar, ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # results are written back by index so the order of url_list is kept
+            futures = {
+                executor.submit(self._fetch_url, url): index
+                for index, url in enumerate(url_list)
+            }
+            try:
+                for future in as_completed(futures):
+                    responce_url_list[futures[future]] = future.result()
+                    pbar.update(1)
+            except XchangerException:
+                for future in futures:
+                    future.cancel()
+                raise
+        self._report_run_stats()
         return responce_url_list
 
     def _data_urls(self, responce_url_list):
-        "Scrape data from the different URLs."
+        "Scrape data from the different URLs, returning a RateTable of the unit rates."
+        with self.instrumentation.span("parse_all"):
+            if self.parse_workers != None:
+                return self._data_urls_in_processes(responce_url_list)
+            return self._data_urls_in_threads(responce_url_list)
+
+    def _data_urls_in_threads(self, responce_url_list):
+        "Scrape data from the different URLs in this thread."
         data_list = []
         print("")
         with tqdm.tqdm(
@@ -478,12 +811,10 @@ class Xchanger:
         ) as pbar:
             for responce in responce_url_list:
                 try:
-                    url_soup = BeautifulSoup(responce, "lxml")
-                    data_p = url_soup.find(
-                        "p", class_="result__BigRate-sc-1bsijpp-1 iGrAod"
+                    xchange_rate = (
+                        self._extract(responce) if responce != "None" else None
                     )
-                    if data_p != None:
-                        xchange_rate = data_p.text.split(" ")[0]
+                    if xchange_rate != None:
                         data_list.append(xchange_rate)
                         pbar.update(1)
                     else:
@@ -491,7 +822,35 @@ class Xchanger:
                         pbar.update(1)
                 except Exception as e:
                     raise XchangerException(f"Fail to get data. Error : {e}.")
-        return data_list
+        return self._rows_to_table(
+            zip(self.only_supported_currencies, data_list), 1, None, None
+        )
+
+    def _data_urls_in_processes(self, responce_url_list):
+        "Scrape data from the different URLs in parse_workers processes, keeping their order."
+        batches = [
+            responce_url_list[start : start + self.parse_batch_size]
+            for start in range(0, len(responce_url_list), self.parse_batch_size)
+        ]
+        data_list = []
+        print("")
+        with tqdm.tqdm(
+            total=len(responce_url_list), desc="scraping data", colour="green"
+        ) as pbar, concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.parse_workers
+        ) as executor:
+            try:
+                # map yields the batches in submission order, whatever order they finish in
+                for rates in executor.map(
+                    partial(extract_batch, self.extractor), batches
+                ):
+                    data_list.extend(rates)
+                    pbar.update(len(rates))
+            except Exception as e:
+                raise XchangerException(f"Fail to get data. Error : {e}.")
+        return self._rows_to_table(
+            zip(self.only_supported_currencies, data_list), 1, None, None
+        )
 
     def _making_dataframe(self, amount, from_currency, to_currency):
         """
@@ -503,20 +862,171 @@ class Xchanger:
             to_currency: The currency that the amount is to be converted to.
 
         Returns:
-            A Pandas DataFrame of the exchange rate data.
+            A Pandas DataFrame of the exchange rate data, with NaN where xe.com gave no rate.
+        """
+        table = self._making_rate_table(amount, from_currency, to_currency)
+        with self.instrumentation.span("dataframe"):
+            return table.to_dataframe()
+
+    def _making_rate_table(self, amount, from_currency, to_currency):
         """
-        data = self._get_data_urls(amount, from_currency, to_currency)
+        Makes a RateTable of the exchange rate data.
+
+        Args:
+            amount: The amount of money to be converted.
+            from_currency: The currency that the amount is in.
+            to_currency: The currency that the amount is to be converted to.
+
+        Returns:
+            A RateTable of the exchange rate data.
+        """
+        with self.instrumentation.span("bulk_run"):
+            return self._making_checkpointed_table(amount, from_currency, to_currency)
+
+    def _making_checkpointed_table(self, amount, from_currency, to_currency):
+        "Make the RateTable of a bulk run, resuming from its checkpoint if checkpoint_dir is set."
+        if self.checkpoint_dir == None:
+            rows = self._iter_rates(from_currency, to_currency)
+            return self._rows_to_table(rows, amount, from_currency, to_currency)
+        self._check_bulk_currencies(from_currency, to_currency)
+        checkpoint = Checkpoint(
+            self.checkpoint_dir,
+            amount,
+            from_currency,
+            to_currency,
+            self.only_supported_currencies,
+            max_age=self.rate_cache.ttl,
+        )
+        done = checkpoint.load()
+        missing = [c for c in self.only_supported_currencies if c not in done]
+        rows = done.items()
+        if missing:
+            fetched = self._iter_rates(from_currency, to_currency, missing)
+            rows = itertools.chain(rows, checkpoint.recording(fetched))
+        table = self._rows_to_table(rows, amount, from_currency, to_currency)
+        if table.valid.all():
+            checkpoint.remove()
+        return table
+
+    def _rows_to_table(self, rows, amount, from_currency, to_currency):
+        "Make the RateTable of a bulk run from its (currency, unit rate) rows."
         try:
-            data_df = {
-                "Currency": [currency for currency in self.only_supported_currencies],
-                "Rate": [val for val in data],
-            }
-            df = pd.DataFrame(data_df)
-            return df
+            rates = np.full(len(SUPPORTED_CURRENCIES), np.nan)
+            for currency, rate in rows:
+                if rate == None or rate == "None":
+                    continue
+                try:
+                    if isinstance(rate, str):
+                        rate = parse_rate(rate)
+                    rates[CURRENCY_INDEX[currency]] = rate
+                except ValueError:
+                    continue
+            rates *= float(amount)
+            return RateTable(rates, amount, from_currency, to_currency)
+        except XchangerException:
+            raise
         except Exception as e:
             raise XchangerException(f"Fail to make dataframe. Error : {e}")
 
-    def save_to_excel(self, amount=1, from_currency="USD", to_currency=None):
+    def convert(self, amounts, from_codes, to_code):
+        """
+        Converts many amounts in mixed currencies to one currency at once.
+
+        Each distinct currency is fetched once through the bulk path and the rates
+        are then applied to every row with a vectorized gather and multiply.
+
+        Args:
+            amounts: A NumPy array, Pandas Series or sequence of amounts.
+            from_codes: The currency code of each amount, with the same length as amounts.
+            to_code: The currency the amounts are converted to.
+
+        Returns:
+            A NumPy float64 array with the same length as amounts, NaN where the code
+            is missing or unsupported or xe.com gave no rate.
+        """
+        self._check_currencies(to_code)
+        amounts = np.asarray(amounts, dtype=np.float64)
+        row_codes, distinct_codes = pd.factorize(np.asarray(from_codes, dtype=object))
+        if len(row_codes) != len(amounts):
+            raise XchangerException("amounts and from_codes must have the same length.")
+        supported_codes = [
+            code
+            for code in distinct_codes
+            if code in CURRENCY_INDEX and code != to_code
+        ]
+        table_rates = np.full(len(SUPPORTED_CURRENCIES), np.nan)
+        if supported_codes:
+            rows = self._iter_rates(None, to_code, supported_codes, progress=False)
+            table_rates = self._rows_to_table(rows, 1, None, to_code).rates
+        table_rates[CURRENCY_INDEX[to_code]] = 1.0
+        # one rate per distinct code, plus a trailing NaN picked by the -1 of missing codes
+        distinct_rates = np.full(len(distinct_codes) + 1, np.nan)
+        for position, code in enumerate(distinct_codes):
+            index = CURRENCY_INDEX.get(code)
+            if index != None:
+                distinct_rates[position] = table_rates[index]
+        return amounts * distinct_rates[row_codes]
+
+    def rate_matrix(self, amount=1, base="USD"):
+        """
+        Makes the full cross-rate matrix of the supported currencies from a single base scrape.
+
+        Args:
+            amount: The amount of money to be converted.
+            base: The currency whose exchange rate table is scraped.
+
+        Returns:
+            A Pandas DataFrame indexed by currency where the cell at row X and
+            column Y is the value of `amount` X in Y.
+        """
+        rates = self._making_rate_table(1, base, None).rates
+        try:
+            # 1 X = rate[Y] / rate[X] Y, so one outer division gives every pair
+            with np.errstate(divide="ignore", invalid="ignore"):
+                matrix = rates[np.newaxis, :] / rates[:, np.newaxis] * float(amount)
+            matrix[~np.isfinite(matrix)] = np.nan
+            currencies = list(self.only_supported_currencies)
+            return pd.DataFrame(matrix, index=currencies, columns=currencies)
+        except Exception as e:
+            raise XchangerException(f"Fail to make rate matrix. Error : {e}")
+
+    def publish_snapshot(self, path, base="USD"):
+        """
+        Scrapes the rates of every supported currency and publishes them to a shared memory-mapped snapshot.
+
+        Other processes read the snapshot with `fx.snapshot.SnapshotReader`
+        without any request. Only one process should publish to a path.
+
+        Args:
+            path: The path of the snapshot file, for example "/dev/shm/xchanger.snap".
+            base: The currency the rates are against. Defaults to "USD".
+
+        Returns:
+            The sequence number of the published snapshot.
+        """
+        table = self._making_rate_table(1, base, None)
+        writer = self._snapshot_writers.get(path)
+        if writer == None:
+            writer = self._snapshot_writers[path] = SnapshotWriter(path)
+        return writer.write(table)
+
+    def _making_export(self, amount, from_currency, to_currency, matrix, extension):
+        "Make the DataFrame to be saved and the name of its file."
+        if matrix:
+            base = from_currency if from_currency != None else to_currency
+            df = self.rate_matrix(amount, base)
+            name_of_file = f"{amount} {base} matrix.{extension}"
+            return df, name_of_file
+        df = self._making_dataframe(amount, from_currency, to_currency)
+        if from_currency != None:
+            name_of_file = f"{amount} {from_currency} data.{extension}"
+        if to_currency != None:
+            name_of_file = f"{amount} {to_currency} data.{extension}"
+        return df, name_of_file
+
+    def save_to_excel(
+        self, amount=1, from_currency="USD", to_currency=None, matrix=False
+    ):
         """
         Save the exchange rate data to an Excel spreadsheet.
 
@@ -524,21 +1034,25 @@ class Xchanger:
             amount: The amount of money to be converted.
             from_currency: The currency that the amount is in.
             to_currency: The currency that the amount is to be converted to.
+            matrix: Save the full cross-rate matrix instead of a single base table.
         """
         print(colored("\nStarting Xchanger...", "green"))
-        df = self._making_dataframe(amount, from_currency, to_currency)
-        if from_currency != None:
-            name_of_file = f"{amount} {from_currency} data.xlsx"
-        if to_currency != None:
-            name_of_file = f"{amount} {to_currency} data.xlsx"
+        df, name_of_file = self._making_export(
+            amount, from_currency, to_currency, matrix, "xlsx"
+        )
         name = self._rename_filename(name_of_file)
-        df.to_excel(f"{name}", "Currency Data")
+        with self.instrumentation.span("write"):
+            df.to_excel(
+                f"{name}", sheet_name="Currency Matrix" if matrix else "Currency Data"
+            )
         print("")
         last_msg = colored(f"{name} saved succcessfully!", "blue")
         print(last_msg)
         return
 
-    def save_to_csv(self, amount=1, from_currency="USD", to_currency=None):
+    def save_to_csv(
+        self, amount=1, from_currency="USD", to_currency=None, matrix=False
+    ):
         """
         Save the exchange rate data to a CSV file.
 
@@ -546,21 +1060,23 @@ class Xchanger:
             amount: The amount of money to be converted.
             from_currency: The currency that the amount is in.
             to_currency: The currency that the amount is to be converted to.
+            matrix: Save the full cross-rate matrix instead of a single base table.
         """
         print(colored("\nStarting Xchanger...", "green"))
-        df = self._making_dataframe(amount, from_currency, to_currency)
-        if from_currency != None:
-            name_of_file = f"{amount} {from_currency} data.csv"
-        if to_currency != None:
-            name_of_file = f"{amount} {to_currency} data.csv"
+        df, name_of_file = self._making_export(
+            amount, from_currency, to_currency, matrix, "csv"
+        )
         name = self._rename_filename(name_of_file)
-        df.to_csv(f"{name}")
+        with self.instrumentation.span("write"):
+            df.to_csv(f"{name}")
         print("")
         last_msg = colored(f"{name} saved succcessfully!", "blue")
         print(last_msg)
         return
 
-    def save_to_json(self, amount=1, from_currency="USD", to_currency=None):
+    def save_to_json(
+        self, amount=1, from_currency="USD", to_currency=None, matrix=False
+    ):
         """
         Save the exchange rate data to a JSON file.
 
@@ -568,20 +1084,69 @@ class Xchanger:
             amount: The amount of money to be converted.
             from_currency: The currency that the amount is in.
             to_currency: The currency that the amount is to be converted to.
+            matrix: Save the full cross-rate matrix instead of a single base table.
         """
         print(colored("\nStarting Xchanger...", "green"))
-        df = self._making_dataframe(amount, from_currency, to_currency)
-        if from_currency != None:
-            name_of_file = f"{amount} {from_currency} data.json"
-        if to_currency != None:
-            name_of_file = f"{amount} {to_currency} data.json"
+        df, name_of_file = self._making_export(
+            amount, from_currency, to_currency, matrix, "json"
+        )
         name = self._rename_filename(name_of_file)
-        df.to_json(f"{name}", orient="records")
+        with self.instrumentation.span("write"):
+            df.to_json(f"{name}", orient="index" if matrix else "records")
         print("")
         last_msg = colored(f"{name} saved succcessfully!", "blue")
         print(last_msg)
         return
 
+    def retry_missing(self, path, amount=1, from_currency="USD", to_currency=None):
+        """
+        Fetches again the rows of an existing export that have no rate and rewrites the file.
+
+        Args:
+            path: The .csv, .json or .xlsx file written by save_to_csv, save_to_json or save_to_excel.
+            amount: The amount the file was saved with.
+            from_currency: The currency that the amount is in.
+            to_currency: The currency that the amount is to be converted to.
+
+        Returns:
+            The number of rows that still have no rate.
+        """
+        self._check_bulk_currencies(from_currency, to_currency)
+        extension = os.path.splitext(path)[1].lower()
+        try:
+            if extension == ".csv":
+                df = pd.read_csv(path, index_col=0)
+            elif extension == ".json":
+                df = pd.read_json(path, orient="records")
+            elif extension == ".xlsx":
+                df = pd.read_excel(path, "Currency Data", index_col=0)
+            else:
+                raise XchangerException(f"Unknown export format {extension}.")
+        except XchangerException:
+            raise
+        except Exception as e:
+            raise XchangerException(f"Fail to read {path}. Error : {e}")
+        rates = pd.to_numeric(
+            df["Rate"].astype(str).str.replace(",", "", regex=False), errors="coerce"
+        )
+        missing = [
+            currency
+            for currency in df.loc[rates.isna(), "Currency"]
+            if currency in CURRENCY_INDEX
+        ]
+        if missing:
+            rows = self._iter_rates(from_currency, to_currency, missing)
+            table = self._rows_to_table(rows, amount, from_currency, to_currency)
+            rates = rates.fillna(df["Currency"].map(table.get))
+            df["Rate"] = rates
+            if extension == ".csv":
+                df.to_csv(path)
+            elif extension == ".json":
+                df.to_json(path, orient="records")
+            else:
+                df.to_excel(path, sheet_name="Currency Data")
+        return int(rates.isna().sum())
+
     def _rename_filename(self, name_of_file):
         """
         Renames a file if the file name already exists.
@@ -592,14 +1157,12 @@ class Xchanger:
         Returns:
             The renamed file name.
         """
-        name = name_of_file
-        for i in range(1, 1000):
-            if name_of_file in os.listdir():
-                name_of_file = name
-                name_of_file = name_of_file.split(".")
-                name_of_file = f"{name_of_file[0]}{i}.{name_of_file[1]}"
-            else:
-                return name_of_file
+        stem, extension = os.path.splitext(name_of_file)
+        i = 0
+        while os.path.exists(name_of_file):
+            i += 1
+            name_of_file = f"{stem}{i}{extension}"
+        return name_of_file
 
 
 # !    |--------------------------------- The END --------------------------------------|
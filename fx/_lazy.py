@@ -0,0 +1,45 @@
+"""Xchanger lazy import helpers"""
+
+import importlib
+
+
+class LazyModule:
+    """
+    Stands in for a module and imports it the first time one of its attributes is used.
+
+    It keeps `import fx.Xchanger` from loading pandas, numpy, tqdm or
+    BeautifulSoup before a feature that needs them is used.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        "Import the module if it is not imported yet and return it."
+        if self._module == None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module != None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+_termcolor = None
+
+
+def colored(text, *args, **kwargs):
+    "Color the text with termcolor, imported on first use, or return it as is if termcolor is missing."
+    global _termcolor
+    if _termcolor == None:
+        try:
+            _termcolor = importlib.import_module("termcolor")
+        except ImportError:
+            _termcolor = False
+    if _termcolor == False:
+        return text
+    return _termcolor.colored(text, *args, **kwargs)
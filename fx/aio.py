@@ -0,0 +1,237 @@
+"""Xchanger asyncio client module"""
+
+import asyncio
+import time
+from decimal import Decimal
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp is only needed by AsyncXchanger
+    aiohttp = None
+
+from fx.Xchanger import Xchanger
+from fx.erros import XchangerException
+from fx.extractors import RateElementScanner
+from fx.results import RateResult
+
+
+class AsyncXchanger(Xchanger):
+    """
+    Asyncio counterpart of Xchanger built on an aiohttp connection pool.
+
+    It shares the currency checks, rate extraction and rate cache of Xchanger,
+    and never blocks the event loop on the network. Requires aiohttp
+    (pip install Xchanger[async]).
+
+    Parameters
+    ----------
+    max_concurrency: int, optional
+        The max_concurrency parameter is the maximum number of requests in flight at once.
+        The max_concurrency parameter is optional and defaults to 16.
+
+    The other parameters are the ones of Xchanger. pool_size bounds the number of
+    connections kept by the aiohttp connector. Of the scheduler, only the retry
+    policy and the throttle statuses are used: max_concurrency takes the place of
+    its rate limit and adaptive concurrency limit, which would block the event
+    loop. The sources and hedge parameters are not supported.
+
+    Example
+    -------
+        async with AsyncXchanger() as converter:
+            value = await converter.aget(10, "USD", "EUR")
+    """
+
+    def __init__(self, *args, max_concurrency=16, **kwargs):
+        if max_concurrency < 1:
+            raise XchangerException("max_concurrency must be a positive integer.")
+        if kwargs.get("sources") != None or kwargs.get("hedge") != None:
+            raise XchangerException(
+                "AsyncXchanger does not support sources or hedge, use Xchanger for them."
+            )
+        super().__init__(*args, **kwargs)
+        self.max_concurrency = max_concurrency
+        self._client = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        await self._open_client()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def _open_client(self):
+        "Open the aiohttp session and the semaphore bounding concurrency."
+        if aiohttp == None:
+            raise XchangerException(
+                "AsyncXchanger needs aiohttp. Install it with: pip install Xchanger[async]"
+            )
+        if self._client == None or self._client.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size)
+            self._client = aiohttp.ClientSession(connector=connector)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def aclose(self):
+        "Close the aiohttp session and its connections."
+        if self._client != None:
+            await self._client.close()
+            self._client = None
+
+    def _proxy_url(self):
+        "Get the single proxy URL aiohttp expects from the requests-style proxies dict."
+        if not self._is_proxy(self.proxies):
+            return None
+        return self.proxies.get("https") or self.proxies.get("http")
+
+    async def _acheck_proxies(self):
+        "Check the proxy once per proxy_check_ttl seconds, sharing the memo of Xchanger."
+        if not self._is_proxy(self.proxies):
+            return
+        key = tuple(sorted(self.proxies.items()))
+        checked = self._proxy_checks.get(key)
+        if checked != None and time.monotonic() - checked[1] <= self.proxy_check_ttl:
+            return
+        try:
+            async with self._client.get(
+                "https://api.ipify.org?format=json", proxy=self._proxy_url()
+            ) as responce:
+                if responce.status != 200:
+                    raise XchangerException(
+                        f"Your Proxy is not wroking! Status code : {responce.status}"
+                    )
+                self._proxy_checks[key] = (await responce.text(), time.monotonic())
+        except aiohttp.ClientError as e:
+            raise XchangerException(f"Fail to check the proxy. Error : {e}")
+
+    async def _afetch_rate(self, url):
+        "Fetch and parse one URL, returning its rate text or the string None once its retries are used up."
+        html = await self._aget_with_retries(url)
+        if html == None:
+            return "None"
+        xchange_rate = self._extract(html)
+        return xchange_rate if xchange_rate != None else "None"
+
+    async def _aget_with_retries(self, url):
+        "Get the page of a URL with the retry policy of the scheduler, or None if every attempt failed."
+        retry = self.scheduler.retry
+        stats = self.scheduler.stats
+        instrumentation = self.instrumentation
+        for attempt in range(retry.max_retries + 1):
+            if attempt > 0:
+                stats.add("retries")
+                instrumentation.count("retries")
+            responce = html = None
+            async with self._semaphore:
+                await self._acheck_proxies()
+                stats.add("requests")
+                instrumentation.count("requests")
+                try:
+                    with instrumentation.span("http"):
+                        responce, html = await self._aget_page(url)
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    stats.add("errors")
+                    instrumentation.count("http_errors")
+            if responce != None:
+                if responce.status in self.scheduler.throttle_statuses:
+                    stats.add("throttled")
+                    instrumentation.count("throttled")
+                elif responce.status >= 400:
+                    instrumentation.count("http_errors")
+                if responce.status not in retry.retry_statuses:
+                    return html
+            if attempt < retry.max_retries:
+                await asyncio.sleep(retry.delay(attempt, responce))
+        stats.add("failures")
+        return None
+
+    async def _aget_page(self, url):
+        "Get the response of a URL and its page, the page being None if the status is not 200."
+        async with self._client.get(url, proxy=self._proxy_url()) as responce:
+            if responce.status != 200:
+                return responce, None
+            if self.stream_fetch:
+                return responce, await self._aread_page(responce)
+            return responce, await responce.text()
+
+    async def _aread_page(self, responce):
+        "Read a page up to the end of its rate element, like `Xchanger._read_page`."
+        scanner = RateElementScanner()
+        async for chunk in responce.content.iter_chunked(self.stream_chunk_size):
+            if scanner.feed(chunk):
+                break
+        return scanner.page(responce.charset)
+
+    async def _afetch_pair_rate(self, pair):
+        "Scrape the unit rate of one pair, cache it and wrap it in a RateResult."
+        rate_text = await self._afetch_rate(self._making_pair_url(*pair))
+        return RateResult(
+            pair, self._cache_rate(pair, rate_text), time.time(), "xe.com"
+        )
+
+    async def aget_many(self, pairs):
+        """
+        Returns the rates of 1 unit of many currency pairs, like `Xchanger.get_rates`.
+
+        Args:
+            pairs: An iterable of (from_currency, to_currency) tuples.
+
+        Returns:
+            A list of RateResult, one per distinct pair, in the order the pairs were first given.
+        """
+        unique_pairs, results, missing_pairs = self._split_cached_pairs(pairs)
+        if missing_pairs:
+            await self._open_client()
+            fetched = await asyncio.gather(
+                *(self._afetch_pair_rate(pair) for pair in missing_pairs)
+            )
+            for result in fetched:
+                results[result.pair] = result
+            self._flush_rates()
+        return [results[pair] for pair in unique_pairs]
+
+    async def aget(self, amount=1, from_currency="USD", to_currency="PKR"):
+        """
+        Returns the value of amount from_currency in to_currency.
+
+        Args:
+            amount: The amount of money to be converted.
+            from_currency: The currency that the amount is in.
+            to_currency: The currency that the amount is to be converted to.
+
+        Returns:
+            The converted amount as a float (decimal.Decimal if decimal=True), or None
+            if xe.com gave no rate for the pair.
+        """
+        (result,) = await self.aget_many([(from_currency, to_currency)])
+        if result.rate == None:
+            return None
+        if self.decimal:
+            return result.rate * Decimal(str(amount))
+        return result.rate * amount
+
+    async def aget_dataframe(self, amount=1, from_currency="USD", to_currency=None):
+        """
+        Makes the same Pandas DataFrame as the bulk path of Xchanger, asynchronously.
+
+        Args:
+            amount: The amount of money to be converted.
+            from_currency: The currency that the amount is in.
+            to_currency: The currency that the amount is to be converted to.
+
+        Returns:
+            A Pandas DataFrame of the exchange rate data.
+        """
+        self._check_bulk_currencies(from_currency, to_currency)
+        rows = [
+            (currency, self._bulk_pair(currency, from_currency, to_currency))
+            for currency in self.only_supported_currencies
+        ]
+        results = await self.aget_many([pair for _, pair in rows])
+        rates = {result.pair: result.rate for result in results}
+        table = self._rows_to_table(
+            ((currency, rates[pair]) for currency, pair in rows),
+            amount,
+            from_currency,
+            to_currency,
+        )
+        return table.to_dataframe()
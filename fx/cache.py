@@ -0,0 +1,302 @@
+"""Xchanger rate cache module"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+from fx.erros import XchangerException
+from fx.extractors import parse_rate
+
+
+class CacheBackend:
+    """
+    Base class of the stores that keep the unit rates of currency pairs.
+
+    A backend maps a (from_currency, to_currency) pair to a (rate, stored_at)
+    entry, where stored_at is a `time.time()` timestamp. Expiry is decided by
+    RateCache, so backends only have to store and return entries.
+    """
+
+    def get(self, pair):
+        "Returns the (rate, stored_at) entry of the pair or None."
+        raise NotImplementedError
+
+    def set(self, pair, rate, stored_at):
+        "Stores the rate of the pair."
+        raise NotImplementedError
+
+    def delete(self, pair):
+        "Removes the pair if it is stored."
+        raise NotImplementedError
+
+    def clear(self):
+        "Removes every stored pair."
+        raise NotImplementedError
+
+    def flush(self):
+        "Writes pending changes to persistent storage."
+
+    def __len__(self):
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """Keeps the rates in memory and evicts the least recently used pair once full."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def get(self, pair):
+        "Returns the (rate, stored_at) entry of the pair or None."
+        entry = self._entries.get(pair)
+        if entry != None:
+            self._entries.move_to_end(pair)
+        return entry
+
+    def set(self, pair, rate, stored_at):
+        "Stores the rate of the pair, evicting the least recently used pair if full."
+        self._entries[pair] = (rate, stored_at)
+        self._entries.move_to_end(pair)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def delete(self, pair):
+        "Removes the pair if it is stored."
+        self._entries.pop(pair, None)
+
+    def clear(self):
+        "Removes every stored pair."
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend(CacheBackend):
+    """Keeps the rates in a SQLite database opened in write-ahead-log mode."""
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS rates ("
+                "from_currency TEXT, to_currency TEXT, rate TEXT, stored_at REAL, "
+                "PRIMARY KEY (from_currency, to_currency)) WITHOUT ROWID"
+            )
+            self._connection.commit()
+        except sqlite3.Error as e:
+            raise XchangerException(f"Fail to open the cache {path}. Error : {e}")
+
+    def get(self, pair):
+        "Returns the (rate, stored_at) entry of the pair or None."
+        row = self._connection.execute(
+            "SELECT rate, stored_at FROM rates WHERE from_currency = ? AND to_currency = ?",
+            pair,
+        ).fetchone()
+        return None if row == None else (row[0], row[1])
+
+    def set(self, pair, rate, stored_at):
+        "Stores the rate of the pair."
+        self._connection.execute(
+            "INSERT OR REPLACE INTO rates VALUES (?, ?, ?, ?)",
+            (*pair, str(rate), stored_at),
+        )
+        self._connection.commit()
+
+    def delete(self, pair):
+        "Removes the pair if it is stored."
+        self._connection.execute(
+            "DELETE FROM rates WHERE from_currency = ? AND to_currency = ?", pair
+        )
+        self._connection.commit()
+
+    def clear(self):
+        "Removes every stored pair."
+        self._connection.execute("DELETE FROM rates")
+        self._connection.commit()
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM rates").fetchone()[0]
+
+
+class FileBackend(CacheBackend):
+    """
+    Keeps the rates in a compact JSON file.
+
+    The file is read once when the backend is created and rewritten atomically
+    on `flush`, or on `set` once `flush_interval` seconds have passed.
+    """
+
+    def __init__(self, path, flush_interval=5):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._entries = {}
+        self._dirty = False
+        self._flushed_at = time.monotonic()
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as file:
+                    for key, entry in json.load(file).items():
+                        from_currency, to_currency = key.split("/")
+                        self._entries[(from_currency, to_currency)] = tuple(entry)
+            except (OSError, ValueError) as e:
+                raise XchangerException(f"Fail to read the cache {path}. Error : {e}")
+
+    def get(self, pair):
+        "Returns the (rate, stored_at) entry of the pair or None."
+        return self._entries.get(pair)
+
+    def set(self, pair, rate, stored_at):
+        "Stores the rate of the pair."
+        self._entries[pair] = (str(rate), stored_at)
+        self._dirty = True
+        if time.monotonic() - self._flushed_at > self.flush_interval:
+            self.flush()
+
+    def delete(self, pair):
+        "Removes the pair if it is stored."
+        if self._entries.pop(pair, None) != None:
+            self._dirty = True
+
+    def clear(self):
+        "Removes every stored pair."
+        self._entries.clear()
+        self._dirty = True
+        self.flush()
+
+    def flush(self):
+        "Rewrites the cache file if a rate changed since the last write."
+        if not self._dirty:
+            return
+        data = {f"{pair[0]}/{pair[1]}": entry for pair, entry in self._entries.items()}
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as file:
+                json.dump(data, file, separators=(",", ":"))
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            raise XchangerException(f"Fail to write the cache {self.path}. Error : {e}")
+        self._dirty = False
+        self._flushed_at = time.monotonic()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RateCache:
+    """
+    Cache of the rates of 1 unit of a currency pair.
+
+    Entries expire `ttl` seconds after they are stored. A pair that is not
+    cached is answered from its inverse pair when that one is. The entries
+    themselves live in a CacheBackend, in memory unless another one is given.
+
+    Parameters
+    ----------
+    ttl: int, optional
+        The number of seconds a rate is served from the cache. Defaults to 3600.
+
+    maxsize: int, optional
+        The maximum number of pairs kept by the default in-memory backend. Defaults to 1024.
+
+    backend: CacheBackend, optional
+        The store of the entries. Defaults to a MemoryBackend of `maxsize` pairs.
+
+    decimal: bool, optional
+        Return the rates read from persistent backends as decimal.Decimal. Defaults to False.
+    """
+
+    def __init__(self, ttl=3600, maxsize=1024, backend=None, decimal=False):
+        self.ttl = ttl
+        self.backend = backend if backend != None else MemoryBackend(maxsize)
+        self.decimal = decimal
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _lookup(self, pair, now, allow_stale=False):
+        "Returns the fresh (rate, stored_at) entry of the pair, dropping it if it has expired."
+        entry = self.backend.get(pair)
+        if entry == None:
+            return None
+        rate, stored_at = entry
+        if now - stored_at > self.ttl and not allow_stale:
+            self.backend.delete(pair)
+            return None
+        if isinstance(rate, str):
+            rate = parse_rate(rate, decimal=self.decimal)
+        return rate, stored_at
+
+    def _lookup_pair(self, pair, now, allow_stale):
+        "Returns the entry of the pair, derived from its inverse pair if only that one is cached."
+        entry = self._lookup(pair, now, allow_stale)
+        if entry == None:
+            inverse = self._lookup((pair[1], pair[0]), now, allow_stale)
+            if inverse != None and inverse[0] != 0:
+                one = Decimal(1) if isinstance(inverse[0], Decimal) else 1.0
+                entry = (one / inverse[0], inverse[1])
+        return entry
+
+    def lookup(self, from_currency, to_currency, allow_stale=False):
+        """
+        Returns the cached (rate, stored_at) entry of the pair, or None on a miss.
+
+        With allow_stale, an expired entry is returned instead of dropped;
+        `is_stale` tells the caller whether it has expired.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._lookup_pair((from_currency, to_currency), now, allow_stale)
+            if entry == None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def peek(self, from_currency, to_currency):
+        "Returns the entry of the pair, fresh or not, without counting a hit or a miss."
+        with self._lock:
+            return self._lookup_pair((from_currency, to_currency), time.time(), True)
+
+    def is_stale(self, stored_at):
+        "Checks if an entry stored at stored_at has expired."
+        return time.time() - stored_at > self.ttl
+
+    def get(self, from_currency, to_currency):
+        "Returns the cached unit rate of the pair, or None on a miss."
+        entry = self.lookup(from_currency, to_currency)
+        return None if entry == None else entry[0]
+
+    def set(self, from_currency, to_currency, rate):
+        "Stores the unit rate of the pair."
+        with self._lock:
+            self.backend.set((from_currency, to_currency), rate, time.time())
+
+    def flush(self):
+        "Writes pending entries of the backend to persistent storage."
+        with self._lock:
+            self.backend.flush()
+
+    def clear(self):
+        "Removes every cached rate and resets the counters."
+        with self._lock:
+            self.backend.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        "Returns the hit and miss counters and the number of cached pairs."
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self.backend),
+            }
@@ -0,0 +1,94 @@
+"""Xchanger bulk job checkpoint module"""
+
+import hashlib
+import json
+import os
+import time
+
+from fx.erros import XchangerException
+
+
+class Checkpoint:
+    """
+    Progress of one bulk job, kept in a small JSON-lines file.
+
+    The file name is derived from the job parameters (amount, base currency
+    and currency set), so rerunning the same job finds it again. Every rate
+    received is appended as one line, and a rerun only fetches the currencies
+    the file has no fresh rate for.
+
+    Parameters
+    ----------
+    directory: str
+        The directory the checkpoint file is kept in.
+
+    amount, from_currency, to_currency, currencies:
+        The parameters of the bulk job.
+
+    max_age: int, optional
+        The number of seconds a recorded rate is reused for. Defaults to 3600.
+    """
+
+    def __init__(
+        self, directory, amount, from_currency, to_currency, currencies, max_age=3600
+    ):
+        job = json.dumps([str(amount), from_currency, to_currency, list(currencies)])
+        key = hashlib.sha1(job.encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(directory, f"xchanger-{key}.ckpt")
+        self.max_age = max_age
+
+    def load(self):
+        "Returns the {currency: rate text} rows recorded less than max_age seconds ago."
+        rows = {}
+        if not os.path.exists(self.path):
+            return rows
+        now = time.time()
+        fresh = {}
+        lines = 0
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                for line in file:
+                    lines += 1
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by a crash
+                    if now - row["t"] <= self.max_age:
+                        rows[row["c"]] = row["r"]
+                        fresh[row["c"]] = line
+            if lines != len(fresh):
+                self._compact(fresh.values())
+        except OSError as e:
+            raise XchangerException(
+                f"Fail to read the checkpoint {self.path}. Error : {e}"
+            )
+        return rows
+
+    def _compact(self, lines):
+        "Rewrite the file with only the given lines, so expired and repeated rows do not pile up across reruns."
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            for line in lines:
+                file.write(line if line.endswith("\n") else line + "\n")
+        os.replace(temp_path, self.path)
+
+    def recording(self, rows):
+        "Yield the (currency, rate) rows of a stream, appending each valid one to the file."
+        try:
+            file = open(self.path, "a", encoding="utf-8")
+        except OSError as e:
+            raise XchangerException(
+                f"Fail to write the checkpoint {self.path}. Error : {e}"
+            )
+        with file:
+            for currency, rate in rows:
+                if rate != None and rate != "None":
+                    line = {"c": currency, "r": str(rate), "t": time.time()}
+                    file.write(json.dumps(line, separators=(",", ":")) + "\n")
+                    file.flush()
+                yield currency, rate
+
+    def remove(self):
+        "Deletes the checkpoint file once the job is complete."
+        if os.path.exists(self.path):
+            os.remove(self.path)
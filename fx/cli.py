@@ -0,0 +1,160 @@
+"""Xchanger command line module"""
+
+import argparse
+import sys
+
+from fx.Xchanger import Xchanger
+from fx.erros import XchangerException
+
+
+def _making_parser():
+    "Make the parser of the xchanger command."
+    parser = argparse.ArgumentParser(
+        prog="xchanger", description="Get and save exchange rates from xe.com."
+    )
+    parser.add_argument(
+        "--base-url",
+        default="https://www.xe.com",
+        help="the site the rates are scraped from (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--proxies", help="the proxy URL the http and https requests are made through"
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=16,
+        help="the number of pages fetched concurrently (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=3600,
+        help="the number of seconds a rate is cached (default: %(default)s)",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser(
+        "serve", help="serve rates over HTTP from a shared cache"
+    )
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument(
+        "--refresh",
+        type=float,
+        default=0,
+        help="keep the most requested pairs fresh every REFRESH seconds (default: off)",
+    )
+    serve.add_argument(
+        "--metrics",
+        action="store_true",
+        help="record metrics and serve them on /metrics",
+    )
+    serve.add_argument(
+        "--log-requests", action="store_true", help="print a line per request"
+    )
+
+    export = commands.add_parser(
+        "export", help="save the rates of every currency against one to a file"
+    )
+    export.add_argument("format", choices=["csv", "json", "excel"])
+    base = export.add_mutually_exclusive_group()
+    base.add_argument(
+        "--from",
+        dest="from_currency",
+        help="the currency the amount is in (default: USD)",
+    )
+    base.add_argument(
+        "--to", dest="to_currency", help="the currency the amount is converted to"
+    )
+    export.add_argument("--amount", type=float, default=1)
+    export.add_argument(
+        "--matrix",
+        action="store_true",
+        help="save the full cross-rate matrix of the base currency",
+    )
+    return parser
+
+
+def _making_xchanger(args, **kwargs):
+    "Make the Xchanger of the command line options."
+    proxies = None
+    if args.proxies != None:
+        proxies = {"http": args.proxies, "https": args.proxies}
+    return Xchanger(
+        proxies=proxies,
+        max_workers=args.max_workers,
+        cache_ttl=args.cache_ttl,
+        base_url=args.base_url,
+        **kwargs,
+    )
+
+
+def _serve(args):
+    "Run the rate server until it is interrupted."
+    from fx.server import RateServer
+
+    instrumentation = None
+    if args.metrics:
+        from fx.instrumentation import Metrics
+
+        instrumentation = Metrics()
+    converter = _making_xchanger(args, instrumentation=instrumentation)
+    if args.refresh > 0:
+        converter.start_refresher(interval=args.refresh)
+    with RateServer(
+        converter, (args.host, args.port), log_requests=args.log_requests
+    ) as server:
+        print(f"Serving rates on {server.url}/rates", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            converter.stop_refresher()
+
+
+def _export(args):
+    "Save the rates of every currency to a file."
+    amount = int(args.amount) if args.amount == int(args.amount) else args.amount
+    from_currency = args.from_currency
+    if from_currency == None and args.to_currency == None:
+        from_currency = "USD"
+    save = {
+        "csv": Xchanger.save_to_csv,
+        "json": Xchanger.save_to_json,
+        "excel": Xchanger.save_to_excel,
+    }[args.format]
+    save(
+        _making_xchanger(args),
+        amount=amount,
+        from_currency=from_currency,
+        to_currency=args.to_currency,
+        matrix=args.matrix,
+    )
+
+
+def main(argv=None):
+    """
+    Runs the xchanger command.
+
+    Args:
+        argv: The command line arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        The exit status of the command.
+    """
+    args = _making_parser().parse_args(argv)
+    try:
+        if args.command == "serve":
+            _serve(args)
+        else:
+            _export(args)
+    except XchangerException as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
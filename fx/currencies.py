@@ -0,0 +1,233 @@
+"""Xchanger supported currencies module"""
+
+from types import MappingProxyType
+
+#  the currencies of xe.com supported by this module, in the order of the rows of every bulk run
+SUPPORTED_CURRENCIES = (
+    "USD",
+    "EUR",
+    "GBP",
+    "CAD",
+    "AUD",
+    "JPY",
+    "INR",
+    "NZD",
+    "CHF",
+    "ZAR",
+    "RUB",
+    "BGN",
+    "SGD",
+    "HKD",
+    "SEK",
+    "THB",
+    "HUF",
+    "CNY",
+    "NOK",
+    "MXN",
+    "DKK",
+    "MYR",
+    "PLN",
+    "BRL",
+    "PHP",
+    "IDR",
+    "CZK",
+    "AED",
+    "TWD",
+    "KRW",
+    "ILS",
+    "ARS",
+    "CLP",
+    "EGP",
+    "TRY",
+    "RON",
+    "SAR",
+    "PKR",
+    "COP",
+    "IQD",
+    "XAU",
+    "FJD",
+    "KWD",
+    "BAM",
+    "ISK",
+    "MAD",
+    "HRK",
+    "VND",
+    "JMD",
+    "JOD",
+    "DOP",
+    "PEN",
+    "CRC",
+    "BHD",
+    "BDT",
+    "DZD",
+    "KES",
+    "XAG",
+    "LKR",
+    "OMR",
+    "QAR",
+    "XOF",
+    "IRR",
+    "XCD",
+    "TND",
+    "TTD",
+    "XPF",
+    "EEK",
+    "ZMK",
+    "ZMW",
+    "BBD",
+    "NGN",
+    "LBP",
+    "XAF",
+    "MUR",
+    "XPT",
+    "BSD",
+    "ALL",
+    "UYU",
+    "BMD",
+    "LVL",
+    "UAH",
+    "GTQ",
+    "XDR",
+    "BWP",
+    "BOB",
+    "CUP",
+    "PYG",
+    "HNL",
+    "LTL",
+    "ZWD",
+    "NIO",
+    "RSD",
+    "NPR",
+    "HTG",
+    "PAB",
+    "SVC",
+    "GYD",
+    "KYD",
+    "TZS",
+    "CNH",
+    "CVE",
+    "FKP",
+    "ANG",
+    "UGX",
+    "MGA",
+    "GEL",
+    "ETB",
+    "MDL",
+    "VUV",
+    "SYP",
+    "BND",
+    "KHR",
+    "NAD",
+    "MKD",
+    "AOA",
+    "PGK",
+    "MMK",
+    "KZT",
+    "MOP",
+    "MZN",
+    "LYD",
+    "SLE",
+    "SLL",
+    "GNF",
+    "BYN",
+    "BYR",
+    "GMD",
+    "AWG",
+    "AMD",
+    "YER",
+    "LAK",
+    "WST",
+    "MWK",
+    "KPW",
+    "BIF",
+    "DJF",
+    "MNT",
+    "UZS",
+    "TOP",
+    "SCR",
+    "KGS",
+    "BTN",
+    "SBD",
+    "GIP",
+    "RWF",
+    "CDF",
+    "MVR",
+    "MRU",
+    "ERN",
+    "SOS",
+    "SZL",
+    "TJS",
+    "LRD",
+    "LSL",
+    "SHP",
+    "STN",
+    "KMF",
+    "SPL",
+    "TMT",
+    "SRD",
+    "IMP",
+    "JEP",
+    "TVD",
+    "GGP",
+    "AFN",
+    "AZN",
+    "BZD",
+    "CUC",
+    "GHS",
+    "SDG",
+    "VES",
+    "VEF",
+    "XPD",
+    "BTC",
+    "ADA",
+    "BCH",
+    "DOGE",
+    "DOT",
+    "ETH",
+    "LINK",
+    "LTC",
+    "LUNA",
+    "UNI",
+    "XLM",
+    "XRP",
+    "ATS",
+    "AZM",
+    "BEF",
+    "CYP",
+    "DEM",
+    "ESP",
+    "FIM",
+    "FRF",
+    "GHC",
+    "GRD",
+    "IEP",
+    "ITL",
+    "LUF",
+    "MGF",
+    "MRO",
+    "MTL",
+    "MZM",
+    "NLG",
+    "PTE",
+    "ROL",
+    "SDD",
+    "SIT",
+    "SKK",
+    "SRG",
+    "STD",
+    "TMM",
+    "TRL",
+    "VAL",
+    "VEB",
+    "XEU",
+)
+
+#  currency code -> position in SUPPORTED_CURRENCIES, for hashed lookups
+CURRENCY_INDEX = MappingProxyType(
+    {currency: index for index, currency in enumerate(SUPPORTED_CURRENCIES)}
+)
+
+
+def is_supported(currency):
+    "Returns True if the currency code is supported by this module."
+    return currency in CURRENCY_INDEX
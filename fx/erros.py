@@ -1,6 +1,6 @@
 '''Xchanger exceptions module'''
 
-from termcolor import colored
+from fx._lazy import colored
 
 class XchangerException(Exception):
     '''Exception class with message as a required parameter'''
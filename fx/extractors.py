@@ -0,0 +1,172 @@
+"""Xchanger rate extractors module"""
+
+import decimal
+import html as html_lib
+import math
+import re
+from decimal import Decimal
+
+from fx._lazy import LazyModule
+
+RATE_TAG = "p"
+RATE_CLASS = "result__BigRate-sc-1bsijpp-1 iGrAod"
+
+_TAG_RE = re.compile(r"<[^>]*>")
+
+bs4 = LazyModule("bs4")  # only needed once a page goes to SoupExtractor
+
+
+class RateExtractor:
+    """
+    Base class of the objects that pull the rate text out of a xe.com page.
+
+    Subclasses implement `extract`, which returns the rate as the text shown by
+    xe.com (for example "0.92374341") or None when the page has no rate.
+    """
+
+    def extract(self, html):
+        "Returns the rate text of the page or None if it is not found."
+        raise NotImplementedError
+
+
+class FastExtractor(RateExtractor):
+    """Scans the raw HTML for the rate element without building a tree."""
+
+    def __init__(self, tag=RATE_TAG, class_=RATE_CLASS):
+        self.tag = tag
+        self._marker = f'class="{class_}"'
+        self._close = f"</{tag}>"
+
+    def extract(self, html):
+        "Returns the rate text of the page or None if it is not found."
+        marker_at = html.find(self._marker)
+        if marker_at == -1:
+            return None
+        tag_at = html.rfind("<", 0, marker_at)
+        if tag_at == -1 or not html.startswith(f"<{self.tag}", tag_at):
+            return None
+        start = html.find(">", marker_at)
+        end = html.find(self._close, start)
+        if start == -1 or end == -1:
+            return None
+        # the rate is split over nested spans ("0.923743<span>41</span> Euros")
+        text = html_lib.unescape(_TAG_RE.sub("", html[start + 1 : end]))
+        return text.split(" ")[0]
+
+
+class SoupExtractor(RateExtractor):
+    """Parses the page with BeautifulSoup, optionally restricted to the rate tag."""
+
+    def __init__(self, parser="lxml", tag=RATE_TAG, class_=RATE_CLASS, restrict=False):
+        self.parser = parser
+        self.tag = tag
+        self.class_ = class_
+        self.restrict = restrict
+        self._strainer = None
+
+    def extract(self, html):
+        "Returns the rate text of the page or None if it is not found."
+        if self.restrict and self._strainer == None:
+            self._strainer = bs4.SoupStrainer(self.tag, class_=self.class_)
+        soup = bs4.BeautifulSoup(html, self.parser, parse_only=self._strainer)
+        data_p = soup.find(self.tag, class_=self.class_)
+        if data_p == None:
+            return None
+        return data_p.text.split(" ")[0]
+
+
+class FallbackExtractor(RateExtractor):
+    """Tries each extractor in turn and returns the first rate found."""
+
+    def __init__(self, *extractors):
+        self.extractors = extractors
+
+    def extract(self, html):
+        "Returns the rate text of the page or None if no extractor finds it."
+        for extractor in self.extractors:
+            rate = extractor.extract(html)
+            if rate != None:
+                return rate
+        return None
+
+
+class RateElementScanner:
+    """
+    Watches the chunks of a page as they are downloaded for the end of the rate element.
+
+    Only a few bytes are kept aside for the search, so each chunk is scanned once.
+    `page` returns what was read so far, which ends right after the rate element
+    once `feed` has returned True, and which any extractor can parse.
+    """
+
+    def __init__(self, tag=RATE_TAG, class_=RATE_CLASS):
+        self._marker = f'class="{class_}"'.encode("ascii")
+        self._close = f"</{tag}>".encode("ascii")
+        self._chunks = []
+        self._tail = b""
+        self._marker_found = False
+        self.complete = False
+
+    def feed(self, chunk):
+        "Adds a downloaded chunk of bytes, returning True once the rate element is complete."
+        self._chunks.append(chunk)
+        window = self._tail + chunk
+        if not self._marker_found:
+            marker_at = window.find(self._marker)
+            if marker_at == -1:
+                self._tail = window[1 - len(self._marker) :]
+                return False
+            self._marker_found = True
+            window = window[marker_at:]
+        if window.find(self._close) == -1:
+            self._tail = window[1 - len(self._close) :]
+            return False
+        self.complete = True
+        return True
+
+    def page(self, encoding=None):
+        "Returns the bytes read so far as text."
+        return b"".join(self._chunks).decode(encoding or "utf-8", errors="replace")
+
+
+def parse_rate(rate, decimal=False):
+    "Converts the rate text shown by xe.com (for example 1,234.56) to a number."
+    rate = rate.replace(",", "")
+    if decimal:
+        return Decimal(rate)
+    return float(rate)
+
+
+_SIGNIFICANT = decimal.Context(prec=10, rounding=decimal.ROUND_HALF_EVEN)
+
+
+def format_rate(value):
+    """
+    Formats a float with at most 10 significant digits, without exponent or trailing zeros.
+
+    It gives the same text as numpy.format_float_positional(value, precision=10,
+    fractional=False, trim="-"), without importing numpy.
+    """
+    if not math.isfinite(value):
+        return repr(value)
+    number = Decimal(repr(value))
+    if len(number.as_tuple().digits) > 10:
+        number = _SIGNIFICANT.plus(Decimal(value))  # round the exact binary value
+    text = format(number, "f")
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return text
+
+
+def extract_batch(extractor, pages):
+    "Returns the rate text of each page, or the string None, for use in parse processes."
+    rates = []
+    for page in pages:
+        rate = extractor.extract(page)
+        rates.append(rate if rate != None else "None")
+    return rates
+
+
+def default_extractor():
+    "Returns the fast scanner with a full BeautifulSoup parse as its fallback."
+    return FallbackExtractor(FastExtractor(), SoupExtractor())
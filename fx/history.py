@@ -0,0 +1,231 @@
+"""Xchanger rate history module"""
+
+import datetime
+import sqlite3
+import threading
+import time
+
+from fx._lazy import LazyModule
+from fx.erros import XchangerException
+
+pd = LazyModule("pandas")
+
+
+def _to_epoch(moment):
+    "Converts a time.time() number, a datetime or an ISO 8601 string to seconds since the epoch."
+    if moment == None or isinstance(moment, (int, float)):
+        return moment
+    if isinstance(moment, str):
+        moment = datetime.datetime.fromisoformat(moment)
+    if isinstance(moment, datetime.datetime):
+        if moment.tzinfo == None:
+            moment = moment.replace(tzinfo=datetime.timezone.utc)
+        return moment.timestamp()
+    if isinstance(moment, datetime.date):
+        return _to_epoch(datetime.datetime.combine(moment, datetime.time()))
+    raise XchangerException(f"Unsupported time {moment!r}.")
+
+
+class RateHistory:
+    """
+    Append-only history of the unit rates scraped from xe.com, in a SQLite database.
+
+    The rows are clustered on (from_currency, to_currency, scraped_at), so the
+    rates of one pair over a time range are read with a single index range scan.
+    Appends are buffered and written in one transaction on `flush`, or once
+    `batch_size` rows are pending. Rates are stored as floats.
+
+    Parameters
+    ----------
+    path: str
+        The path of the SQLite database, created if it does not exist.
+
+    batch_size: int, optional
+        The number of pending rows that triggers a write. Defaults to 512.
+
+    Example
+    -------
+        history = RateHistory("rates.sqlite")
+        converter = Xchanger(history=history)
+        converter.save_to_csv(from_currency="USD")
+        df = history.query("USD", "EUR", start="2024-01-01")
+    """
+
+    def __init__(self, path, batch_size=512):
+        self.path = path
+        self.batch_size = batch_size
+        self._pending = []
+        self._lock = threading.Lock()
+        try:
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS history ("
+                "from_currency TEXT, to_currency TEXT, scraped_at REAL, rate REAL, "
+                "PRIMARY KEY (from_currency, to_currency, scraped_at)) WITHOUT ROWID"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS history_scraped_at ON history (scraped_at)"
+            )
+            self._connection.commit()
+        except sqlite3.Error as e:
+            raise XchangerException(f"Fail to open the history {path}. Error : {e}")
+
+    def append(self, from_currency, to_currency, rate, scraped_at=None):
+        "Records the unit rate of a pair, scraped now unless scraped_at says otherwise."
+        if rate == None:
+            return
+        row = (
+            from_currency,
+            to_currency,
+            time.time() if scraped_at == None else _to_epoch(scraped_at),
+            float(rate),
+        )
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._write_pending()
+
+    def append_many(self, rows):
+        "Records (from_currency, to_currency, rate, scraped_at) rows, skipping the ones without a rate."
+        now = time.time()
+        rows = [
+            (f, t, now if at == None else _to_epoch(at), float(rate))
+            for f, t, rate, at in rows
+            if rate != None and rate == rate  # NaN marks a missing rate
+        ]
+        with self._lock:
+            self._pending.extend(rows)
+            self._write_pending()
+
+    def append_table(self, table, scraped_at=None):
+        """
+        Records every rate of a bulk run in one transaction.
+
+        Args:
+            table: The RateTable of a bulk run, as made by `Xchanger._making_rate_table`.
+            scraped_at: The time the rates were scraped. Defaults to now.
+
+        Returns:
+            The number of rates recorded.
+        """
+        rates = table.rates / table.amount
+        rows = [
+            (
+                self._base_pair(currency, table.from_currency, table.to_currency)
+                + (rate, scraped_at)
+            )
+            for currency, rate, valid in zip(table.currencies, rates, table.valid)
+            if valid
+        ]
+        self.append_many(rows)
+        return len(rows)
+
+    def append_dataframe(
+        self, df, amount=1, from_currency=None, to_currency=None, scraped_at=None
+    ):
+        """
+        Records the Currency and Rate columns made by `Xchanger._making_dataframe` in one transaction.
+
+        Args:
+            df: The DataFrame of a bulk run.
+            amount: The amount the rates were multiplied by.
+            from_currency: The currency that the amount is in.
+            to_currency: The currency that the amount is to be converted to.
+            scraped_at: The time the rates were scraped. Defaults to now.
+
+        Returns:
+            The number of rates recorded.
+        """
+        if (from_currency == None) == (to_currency == None):
+            raise XchangerException(
+                "Give exactly one of from_currency and to_currency for a bulk DataFrame."
+            )
+        rates = pd.to_numeric(df["Rate"], errors="coerce") / float(amount)
+        rows = [
+            self._base_pair(currency, from_currency, to_currency) + (rate, scraped_at)
+            for currency, rate in zip(df["Currency"], rates)
+            if rate == rate
+        ]
+        self.append_many(rows)
+        return len(rows)
+
+    @staticmethod
+    def _base_pair(currency, from_currency, to_currency):
+        "Get the (from, to) pair of one row of a bulk run."
+        if from_currency == None:
+            return (currency, to_currency)
+        return (from_currency, currency)
+
+    def _write_pending(self):
+        "Write the pending rows in one transaction, the lock being held."
+        if not self._pending:
+            return
+        try:
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT OR IGNORE INTO history VALUES (?, ?, ?, ?)", self._pending
+                )
+        except sqlite3.Error as e:
+            raise XchangerException(
+                f"Fail to write the history {self.path}. Error : {e}"
+            )
+        self._pending = []
+
+    def flush(self):
+        "Writes the pending rows to the database."
+        with self._lock:
+            self._write_pending()
+
+    def query(self, from_currency, to_currency, start=None, end=None):
+        """
+        Returns the recorded rates of a pair scraped between start and end.
+
+        Args:
+            from_currency: The currency of the pair that the amount is in.
+            to_currency: The currency of the pair that the amount is converted to.
+            start: The earliest time, as a time.time() number, a datetime or an ISO 8601 string.
+            end: The latest time, in the same forms. Naive datetimes are taken as UTC.
+
+        Returns:
+            A Pandas DataFrame with a UTC Timestamp column and a Rate column, oldest first.
+        """
+        start = _to_epoch(start)
+        end = _to_epoch(end)
+        with self._lock:
+            self._write_pending()
+            rows = self._connection.execute(
+                "SELECT scraped_at, rate FROM history "
+                "WHERE from_currency = ? AND to_currency = ? "
+                "AND scraped_at >= ? AND scraped_at <= ? ORDER BY scraped_at",
+                (
+                    from_currency,
+                    to_currency,
+                    start if start != None else float("-inf"),
+                    end if end != None else float("inf"),
+                ),
+            ).fetchall()
+        df = pd.DataFrame(rows, columns=["Timestamp", "Rate"])
+        df["Timestamp"] = pd.to_datetime(df["Timestamp"], unit="s", utc=True)
+        return df
+
+    def pairs(self):
+        "Returns the (from_currency, to_currency) pairs recorded."
+        with self._lock:
+            self._write_pending()
+            return self._connection.execute(
+                "SELECT DISTINCT from_currency, to_currency FROM history"
+            ).fetchall()
+
+    def __len__(self):
+        with self._lock:
+            self._write_pending()
+            return self._connection.execute("SELECT COUNT(*) FROM history").fetchone()[
+                0
+            ]
+
+    def close(self):
+        "Writes the pending rows and closes the database."
+        self.flush()
+        self._connection.close()
@@ -0,0 +1,228 @@
+"""Xchanger instrumentation module"""
+
+import bisect
+import json
+import math
+import threading
+import time
+
+STAGES = (
+    "proxy_check",
+    "cache_lookup",
+    "http",
+    "parse",
+    "fetch_all",
+    "parse_all",
+    "bulk_run",
+    "dataframe",
+    "write",
+)
+
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+class _NullSpan:
+    """Context manager that measures nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Instrumentation:
+    """
+    Hooks Xchanger calls around each stage of its work. This base class does nothing.
+
+    The stages timed with `span` are listed in STAGES: proxy_check, cache_lookup,
+    http (one attempt of one request), parse (one page), fetch_all and parse_all
+    (the two halves of the buffered bulk path), bulk_run (a whole bulk table),
+    dataframe and write (a save_to_* file). The counters are requests, retries,
+    throttled, http_errors, cache_hits, cache_misses, parse_misses and hedges.
+    Subclass it, or use Metrics, to record them.
+    """
+
+    def span(self, stage):
+        "Returns a context manager timing the stage."
+        return _NULL_SPAN
+
+    def observe(self, stage, seconds):
+        "Records that one run of the stage took seconds."
+
+    def count(self, name, value=1):
+        "Adds value to the counter called name."
+
+
+class _Span:
+    """Context manager passing its duration to Instrumentation.observe."""
+
+    __slots__ = ("instrumentation", "stage", "started")
+
+    def __init__(self, instrumentation, stage):
+        self.instrumentation = instrumentation
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.instrumentation.observe(self.stage, time.perf_counter() - self.started)
+        return False
+
+
+class Histogram:
+    """Latency histogram with fixed bucket bounds in seconds."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds=DEFAULT_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def add(self, seconds):
+        "Counts one observation."
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def cumulative(self):
+        "Returns the (upper bound, observations at or below it) pairs, ending with +Inf."
+        pairs = []
+        total = 0
+        for bound, count in zip(self.bounds + (math.inf,), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def as_dict(self):
+        "Returns the histogram as a dict."
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {
+                ("+Inf" if bound == math.inf else repr(bound)): total
+                for bound, total in self.cumulative()
+            },
+        }
+
+
+class Metrics(Instrumentation):
+    """
+    Instrumentation recording counters and a latency histogram per stage.
+
+    Listeners added with `add_listener` are called with (stage, seconds) after
+    every span, from the thread that ran the stage. The recorded metrics can be
+    exported with `to_prometheus` or `to_json`.
+
+    Parameters
+    ----------
+    buckets: tuple, optional
+        The upper bounds of the histogram buckets, in seconds. Defaults to DEFAULT_BUCKETS.
+
+    prefix: str, optional
+        The prefix of the Prometheus metric names. Defaults to "xchanger".
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix="xchanger"):
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        self.counters = {}
+        self.histograms = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, callback):
+        "Calls callback(stage, seconds) after every span."
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        "Stops calling callback."
+        self._listeners.remove(callback)
+
+    def span(self, stage):
+        "Returns a context manager timing the stage."
+        return _Span(self, stage)
+
+    def observe(self, stage, seconds):
+        "Records that one run of the stage took seconds."
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram == None:
+                histogram = self.histograms[stage] = Histogram(self.buckets)
+            histogram.add(seconds)
+        for callback in self._listeners:
+            callback(stage, seconds)
+
+    def count(self, name, value=1):
+        "Adds value to the counter called name."
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def reset(self):
+        "Forgets every recorded metric."
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+
+    def snapshot(self):
+        "Returns the counters and histograms as a dict."
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "stages": {
+                    stage: histogram.as_dict()
+                    for stage, histogram in self.histograms.items()
+                },
+            }
+
+    def to_json(self, **kwargs):
+        "Returns the metrics as JSON text, passing kwargs to json.dumps."
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def to_prometheus(self):
+        "Returns the metrics in the Prometheus text exposition format."
+        lines = []
+        with self._lock:
+            for name in sorted(self.counters):
+                metric = f"{self.prefix}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {self.counters[name]}")
+            if self.histograms:
+                metric = f"{self.prefix}_stage_seconds"
+                lines.append(f"# HELP {metric} Time spent in each stage of Xchanger.")
+                lines.append(f"# TYPE {metric} histogram")
+            for stage in sorted(self.histograms):
+                histogram = self.histograms[stage]
+                for bound, total in histogram.cumulative():
+                    le = "+Inf" if bound == math.inf else repr(bound)
+                    lines.append(
+                        f'{metric}_bucket{{stage="{stage}",le="{le}"}} {total}'
+                    )
+                lines.append(f'{metric}_sum{{stage="{stage}"}} {histogram.sum}')
+                lines.append(f'{metric}_count{{stage="{stage}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
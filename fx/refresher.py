@@ -0,0 +1,176 @@
+"""Xchanger background refresher module"""
+
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from fx.erros import XchangerException
+
+
+class BackgroundRefresher:
+    """
+    Keeps the most requested pairs of an Xchanger fresh from a daemon thread.
+
+    Every read of a pair is counted. Every `interval` seconds the `top_n` most
+    requested pairs whose cached rate is older than `refresh_ahead` of the cache
+    ttl are scraped again, so reads of hot pairs are answered from memory. While
+    the refresher runs, expired rates are served flagged as stale and their pair
+    is refreshed right away instead of at the next interval, unless they expired
+    more than `max_stale` seconds ago. The counts are halved every interval, so
+    pairs that are no longer read cool down, but a pair is only forgotten once
+    it was not read for long enough to have become due, so a pair read once is
+    still refreshed ahead.
+
+    Parameters
+    ----------
+    xchanger: Xchanger
+        The client whose rate cache is kept fresh.
+
+    interval: float, optional
+        The number of seconds between two refreshes. Defaults to 60.
+
+    top_n: int, optional
+        The number of most requested pairs kept fresh. Defaults to 32.
+
+    refresh_ahead: float, optional
+        The fraction of the cache ttl after which a hot pair is refreshed. Defaults to 0.8.
+
+    max_stale: float, optional
+        The most seconds past its expiry a rate is served stale for. An older rate is
+        scraped again before it is returned. Defaults to the cache ttl.
+    """
+
+    def __init__(
+        self, xchanger, interval=60, top_n=32, refresh_ahead=0.8, max_stale=None
+    ):
+        if interval <= 0:
+            raise XchangerException("interval must be a positive number.")
+        if top_n < 1:
+            raise XchangerException("top_n must be a positive integer.")
+        if not 0 < refresh_ahead <= 1:
+            raise XchangerException("refresh_ahead must be between 0 and 1.")
+        if max_stale != None and max_stale < 0:
+            raise XchangerException("max_stale must be a positive number or None.")
+        self.xchanger = xchanger
+        self.interval = interval
+        self.top_n = top_n
+        self.refresh_ahead = refresh_ahead
+        self.max_stale = max_stale
+        self.refreshes = 0
+        self.errors = 0
+        self._counts = Counter()
+        self._last_read = {}
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        "Checks if the refresh thread is alive."
+        return self._thread != None and self._thread.is_alive()
+
+    def start(self):
+        "Starts the refresh thread."
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="xchanger-refresher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        "Stops the refresh thread, waiting up to timeout seconds for a refresh in progress."
+        self._stop.set()
+        self._wake.set()
+        if self._thread != None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def record(self, pair):
+        "Counts one read of the pair."
+        with self._lock:
+            self._counts[pair] += 1
+            self._last_read[pair] = time.time()
+
+    def request_refresh(self, pair):
+        "Asks for the pair to be refreshed as soon as possible."
+        with self._lock:
+            self._pending.add(pair)
+        self._wake.set()
+
+    def hot_pairs(self):
+        "Returns the top_n most requested pairs, the most requested first."
+        with self._lock:
+            return [pair for pair, _ in self._counts.most_common(self.top_n)]
+
+    def due_pairs(self):
+        "Returns the pairs asked for and the hot pairs whose rate is about to expire."
+        with self._lock:
+            pending = list(self._pending)
+            self._pending.clear()
+        cache = self.xchanger.rate_cache
+        horizon = time.time() - cache.ttl * self.refresh_ahead
+        due = dict.fromkeys(pending)
+        for pair in self.hot_pairs():
+            entry = cache.peek(*pair)
+            if entry == None or entry[1] <= horizon:
+                due[pair] = None
+        return list(due)
+
+    def refresh(self):
+        "Scrapes the due pairs again and returns the number of them refreshed."
+        pairs = self.due_pairs()
+        if pairs:
+            workers = min(self.xchanger.max_workers, len(pairs))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(
+                    executor.map(
+                        partial(self.xchanger._fetch_pair_rate, refresh=True), pairs
+                    )
+                )
+            self.xchanger._flush_rates()
+            self.refreshes += sum(result.rate != None for result in results)
+        return len(pairs)
+
+    def is_too_stale(self, stored_at):
+        "Checks if a rate stored at stored_at expired more than max_stale seconds ago."
+        ttl = self.xchanger.rate_cache.ttl
+        max_stale = self.max_stale if self.max_stale != None else ttl
+        return time.time() - stored_at > ttl + max_stale
+
+    def _cool_down(self):
+        "Halve the read counts, forgetting the pairs not read since they would have become due."
+        # a rate read now was stored now at the latest, so it is due within
+        # ttl * refresh_ahead; keep the pair one more interval to refresh it then
+        keep = self.xchanger.rate_cache.ttl * self.refresh_ahead + 2 * self.interval
+        now = time.time()
+        with self._lock:
+            for pair in list(self._counts):
+                if now - self._last_read[pair] > keep:
+                    del self._counts[pair]
+                    del self._last_read[pair]
+                else:
+                    self._counts[pair] = max(1, self._counts[pair] // 2)
+
+    def _run(self):
+        "Refresh the due pairs every interval seconds or when a stale pair is read."
+        # the counts decay on a clock, so stale reads waking the thread often
+        # do not turn the ranking into an all-time total
+        next_cool_down = time.monotonic() + self.interval
+        while not self._stop.is_set():
+            self._wake.wait(max(0, next_cool_down - time.monotonic()))
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.refresh()
+            except Exception:
+                self.errors += 1  # keep serving the cached rates, retry next time
+            if time.monotonic() >= next_cool_down:
+                self._cool_down()
+                next_cool_down = time.monotonic() + self.interval
@@ -0,0 +1,136 @@
+"""Xchanger results module"""
+
+from fx._lazy import LazyModule
+from fx.currencies import CURRENCY_INDEX, SUPPORTED_CURRENCIES
+from fx.erros import XchangerException
+
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+
+
+class RateResult:
+    """
+    The unit rate of one currency pair as returned by `Xchanger.get_rates`.
+
+    Attributes
+    ----------
+    pair: tuple
+        The (from_currency, to_currency) pair.
+
+    rate: float or decimal.Decimal
+        The value of 1 from_currency in to_currency, None if xe.com gave no rate.
+
+    timestamp: float
+        The `time.time()` at which the rate was scraped.
+
+    source: str
+        Where the rate came from, "xe.com" or "cache".
+
+    stale: bool
+        True if the cached rate has expired and is being refreshed in the background.
+    """
+
+    __slots__ = ("pair", "rate", "timestamp", "source", "stale")
+
+    def __init__(self, pair, rate, timestamp, source, stale=False):
+        self.pair = pair
+        self.rate = rate
+        self.timestamp = timestamp
+        self.source = source
+        self.stale = stale
+
+    def __repr__(self):
+        return (
+            f"RateResult(pair={self.pair!r}, rate={self.rate!r}, "
+            f"timestamp={self.timestamp!r}, source={self.source!r}, "
+            f"stale={self.stale!r})"
+        )
+
+
+class RateTable:
+    """
+    The rates of every supported currency against one base currency.
+
+    The rates are kept in a NumPy float64 array aligned with `currencies`,
+    with NaN and a False entry of the `valid` mask where xe.com gave no rate.
+    Lookups by code are O(1) and `to_dataframe` wraps the array without copying it.
+
+    Attributes
+    ----------
+    currencies: tuple
+        The currency codes of the rows, SUPPORTED_CURRENCIES unless given.
+
+    rates: numpy.ndarray
+        The value of `amount` in each currency (or of `amount` of each currency in the base).
+
+    valid: numpy.ndarray
+        The boolean mask of the rows that have a rate.
+
+    amount: int or float
+        The amount the rates are multiplied by.
+
+    from_currency, to_currency: str or None
+        The base of the table, exactly one of them is None.
+    """
+
+    __slots__ = (
+        "currencies",
+        "rates",
+        "valid",
+        "amount",
+        "from_currency",
+        "to_currency",
+        "_index",
+    )
+
+    def __init__(
+        self,
+        rates,
+        amount=1,
+        from_currency=None,
+        to_currency=None,
+        currencies=SUPPORTED_CURRENCIES,
+    ):
+        self.rates = np.asarray(rates, dtype=np.float64)
+        if len(self.rates) != len(currencies):
+            raise XchangerException("A RateTable needs one rate per currency.")
+        self.currencies = tuple(currencies)
+        self.valid = ~np.isnan(self.rates)
+        self.amount = amount
+        self.from_currency = from_currency
+        self.to_currency = to_currency
+        if currencies is SUPPORTED_CURRENCIES:
+            self._index = CURRENCY_INDEX
+        else:
+            self._index = {currency: i for i, currency in enumerate(self.currencies)}
+
+    def __len__(self):
+        return len(self.currencies)
+
+    def __contains__(self, currency):
+        return currency in self._index
+
+    def __getitem__(self, currency):
+        "Returns the rate of the currency, or None if the table has no rate for it."
+        index = self._index[currency]
+        return float(self.rates[index]) if self.valid[index] else None
+
+    def get(self, currency, default=None):
+        "Returns the rate of the currency, or default if it is missing or unknown."
+        index = self._index.get(currency)
+        if index == None or not self.valid[index]:
+            return default
+        return float(self.rates[index])
+
+    def to_dataframe(self):
+        "Returns the table as a Pandas DataFrame with Currency and Rate columns, sharing the rate array."
+        return pd.DataFrame(
+            {"Currency": self.currencies, "Rate": self.rates}, copy=False
+        )
+
+    def __repr__(self):
+        base = self.from_currency if self.from_currency != None else self.to_currency
+        return (
+            f"RateTable(base={base!r}, amount={self.amount!r}, "
+            f"rates={int(self.valid.sum())}/{len(self)})"
+        )
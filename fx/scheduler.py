@@ -0,0 +1,224 @@
+"""Xchanger request scheduler module"""
+
+import random
+import threading
+import time
+
+import requests
+
+
+class TokenBucket:
+    """
+    Token bucket limiting the rate requests are sent at.
+
+    Parameters
+    ----------
+    rate: float
+        The number of tokens added per second, i.e. the sustained requests per second.
+
+    capacity: int, optional
+        The maximum number of tokens stored, i.e. the largest burst. Defaults to rate.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity != None else max(1, rate))
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        "Blocks until a token is available and takes it."
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated_at) * self.rate
+                )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveLimit:
+    """
+    Concurrency limit adjusted with additive increase and multiplicative decrease.
+
+    Every `limit` successful responses raise the limit by one, a throttled one
+    multiplies it by `decrease_factor`. The limit stays between 1 and `maximum`.
+    """
+
+    def __init__(self, maximum, initial=None, decrease_factor=0.5):
+        self.maximum = maximum
+        self.limit = float(initial if initial != None else maximum)
+        self.decrease_factor = decrease_factor
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        "Blocks until fewer than limit requests are in flight."
+        with self._condition:
+            while self._in_flight >= int(self.limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self):
+        "Marks a request as finished."
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify()
+
+    def on_success(self):
+        "Raises the limit by 1 / limit, so by one per limit successes."
+        with self._condition:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+    def on_throttle(self):
+        "Cuts the limit by decrease_factor."
+        with self._condition:
+            self.limit = max(1.0, self.limit * self.decrease_factor)
+
+
+class RetryPolicy:
+    """
+    Which responses are retried and how long to wait before each retry.
+
+    The wait of attempt n is drawn uniformly from [0, min(backoff_max,
+    backoff_base * 2 ** n)] ("full jitter"), unless the response sends a
+    Retry-After header in seconds.
+    """
+
+    def __init__(
+        self,
+        max_retries=3,
+        retry_statuses=(429, 500, 502, 503, 504),
+        backoff_base=0.5,
+        backoff_max=30,
+    ):
+        self.max_retries = max_retries
+        self.retry_statuses = frozenset(retry_statuses)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def delay(self, attempt, responce=None):
+        "Returns the number of seconds to wait before retry number attempt (from 0)."
+        if responce != None:
+            retry_after = responce.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(self.backoff_max, float(retry_after))
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+
+class SchedulerStats:
+    """Counters of one bulk run."""
+
+    __slots__ = ("requests", "retries", "throttled", "errors", "failures", "_lock")
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.errors = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def add(self, name, count=1):
+        "Increments the counter called name."
+        with self._lock:
+            setattr(self, name, getattr(self, name) + count)
+
+    def as_dict(self):
+        "Returns the counters as a dict."
+        return {name: getattr(self, name) for name in self.__slots__[:-1]}
+
+    def __repr__(self):
+        counters = ", ".join(f"{key}={value}" for key, value in self.as_dict().items())
+        return f"SchedulerStats({counters})"
+
+
+class RequestScheduler:
+    """
+    Sends requests through a token bucket, an adaptive concurrency limit and a retry policy.
+
+    Parameters
+    ----------
+    rate: float, optional
+        The maximum sustained number of requests per second. Defaults to None (no limit).
+
+    burst: int, optional
+        The number of requests that may be sent at once above rate. Defaults to rate.
+
+    max_concurrency: int, optional
+        The highest number of requests in flight the adaptive limit can reach. Defaults to 16.
+
+    retry: RetryPolicy, optional
+        The retry policy. Defaults to RetryPolicy().
+
+    throttle_statuses: tuple, optional
+        The statuses that mean the server is throttling us. Defaults to (429, 503).
+    """
+
+    def __init__(
+        self,
+        rate=None,
+        burst=None,
+        max_concurrency=16,
+        retry=None,
+        throttle_statuses=(429, 503),
+    ):
+        self.bucket = TokenBucket(rate, burst) if rate != None else None
+        self.limit = AdaptiveLimit(max_concurrency)
+        self.retry = retry if retry != None else RetryPolicy()
+        self.throttle_statuses = frozenset(throttle_statuses)
+        self.stats = SchedulerStats()
+
+    def start_run(self):
+        "Starts the counters of a new run and returns them."
+        self.stats = SchedulerStats()
+        return self.stats
+
+    def request(self, send):
+        """
+        Calls send() until it returns a response that needs no retry.
+
+        Args:
+            send: A callable taking no arguments and returning a requests.Response.
+
+        Returns:
+            The last response, or None if every attempt raised a network error.
+        """
+        stats = self.stats
+        for attempt in range(self.retry.max_retries + 1):
+            if attempt > 0:
+                stats.add("retries")
+            if self.bucket != None:
+                self.bucket.acquire()
+            self.limit.acquire()
+            try:
+                stats.add("requests")
+                responce = send()
+            except requests.RequestException:
+                responce = None
+                stats.add("errors")
+            finally:
+                self.limit.release()
+            if responce != None and responce.status_code in self.throttle_statuses:
+                stats.add("throttled")
+                self.limit.on_throttle()
+            elif responce != None and responce.status_code < 400:
+                self.limit.on_success()
+            if (
+                responce != None
+                and responce.status_code not in self.retry.retry_statuses
+            ):
+                return responce
+            if attempt < self.retry.max_retries:
+                time.sleep(self.retry.delay(attempt, responce))
+                if responce != None:
+                    responce.close()  # hand a streamed connection back before retrying
+        stats.add("failures")
+        return responce
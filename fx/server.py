@@ -0,0 +1,194 @@
+"""Xchanger rate server module"""
+
+import json
+import math
+import sys
+import threading
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from fx.currencies import CURRENCY_INDEX, SUPPORTED_CURRENCIES
+from fx.erros import XchangerException
+
+
+class _RequestError(Exception):
+    """A request the server answers with an error status and a JSON message."""
+
+    def __init__(self, status, message):
+        self.status = status
+        self.message = message
+        super().__init__(message)
+
+
+class RateServer(ThreadingHTTPServer):
+    """
+    Local HTTP server answering batches of rate lookups from one shared Xchanger.
+
+    Every request thread uses the same Xchanger, so its rate cache is warm for
+    every client and concurrent misses of the same pair share one request to
+    xe.com. The endpoints are:
+
+        GET /rates?base=USD&symbols=EUR,PKR&amount=1
+            The value of amount base in each symbol (every supported currency
+            if symbols is not given), as JSON.
+        GET /health
+            {"status": "ok"}
+        GET /metrics
+            The Prometheus text of the Xchanger instrumentation, if it is an
+            fx.instrumentation.Metrics.
+
+    Parameters
+    ----------
+    xchanger: Xchanger
+        The client the rates are looked up with.
+
+    address: tuple, optional
+        The (host, port) the server listens on. Defaults to ("127.0.0.1", 8080).
+        Port 0 picks a free port, see `url`.
+
+    log_requests: bool, optional
+        Print a line per request to stderr. Defaults to False.
+
+    Example
+    -------
+        with RateServer(Xchanger(), ("127.0.0.1", 8080)) as server:
+            server.serve_forever()
+    """
+
+    daemon_threads = True
+
+    def __init__(self, xchanger, address=("127.0.0.1", 8080), log_requests=False):
+        self.xchanger = xchanger
+        self.log_requests = log_requests
+        self._thread = None
+        super().__init__(address, _RateRequestHandler)
+
+    @property
+    def url(self):
+        "The base URL the server answers on."
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def rates(self, base, symbols=None, amount=1):
+        """
+        Looks up the value of amount base in each symbol.
+
+        Args:
+            base: The currency that the amount is in.
+            symbols: The currencies to convert to. Defaults to every other supported currency.
+            amount: The amount of money to be converted.
+
+        Returns:
+            A dict with the base, the amount, the rates by symbol (None where xe.com gave
+            no rate), the symbols served stale and the time of the oldest rate.
+        """
+        if base not in CURRENCY_INDEX:
+            raise _RequestError(400, f"Unsupported currency: {base}")
+        if symbols == None:
+            symbols = [
+                currency for currency in SUPPORTED_CURRENCIES if currency != base
+            ]
+        unknown = [symbol for symbol in symbols if symbol not in CURRENCY_INDEX]
+        if unknown:
+            raise _RequestError(400, f"Unsupported currency: {', '.join(unknown)}")
+        try:
+            results = self.xchanger.get_rates((base, symbol) for symbol in symbols)
+        except XchangerException as e:
+            raise _RequestError(502, f"Fail to get the rates. Error : {e}")
+        rates = {}
+        stale = []
+        for result in results:
+            symbol = result.pair[1]
+            rates[symbol] = None if result.rate == None else float(result.rate) * amount
+            if result.stale:
+                stale.append(symbol)
+        return {
+            "base": base,
+            "amount": amount,
+            "rates": rates,
+            "stale": stale,
+            "timestamp": min((result.timestamp for result in results), default=None),
+        }
+
+    def start(self):
+        "Serves requests from a daemon thread and returns the server."
+        if self._thread == None:
+            self._thread = threading.Thread(
+                target=self.serve_forever, name="xchanger-server", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        "Stops serving and closes the socket."
+        if self._thread != None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class _RateRequestHandler(BaseHTTPRequestHandler):
+    """Answers the requests of a RateServer."""
+
+    server_version = "Xchanger"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        try:
+            if url.path == "/rates":
+                self._send_json(200, self.server.rates(*self._rates_args(query)))
+            elif url.path == "/health":
+                self._send_json(200, {"status": "ok"})
+            elif url.path == "/metrics" and hasattr(
+                self.server.xchanger.instrumentation, "to_prometheus"
+            ):
+                text = self.server.xchanger.instrumentation.to_prometheus()
+                self._send(200, text.encode("utf-8"), "text/plain; version=0.0.4")
+            else:
+                raise _RequestError(404, f"Not found: {url.path}")
+        except _RequestError as e:
+            self._send_json(e.status, {"error": e.message})
+        except Exception as e:
+            traceback.print_exc(file=sys.stderr)
+            self._send_json(500, {"error": f"Internal error : {e}"})
+
+    def _rates_args(self, query):
+        "Get the base, symbols and amount of a /rates query."
+        base = query.get("base", ["USD"])[-1].upper()
+        symbols = None
+        if "symbols" in query:
+            symbols = [
+                symbol.strip().upper()
+                for value in query["symbols"]
+                for symbol in value.split(",")
+                if symbol.strip()
+            ]
+        try:
+            amount = float(query.get("amount", ["1"])[-1])
+        except ValueError:
+            raise _RequestError(400, "amount must be a number.")
+        if not math.isfinite(amount):
+            raise _RequestError(400, "amount must be a finite number.")
+        return base, symbols, amount
+
+    def _send_json(self, status, body):
+        "Send body as a JSON responce."
+        self._send(status, json.dumps(body).encode("utf-8"), "application/json")
+
+    def _send(self, status, payload, content_type):
+        "Send a responce with the payload."
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        if self.server.log_requests:
+            super().log_message(format, *args)
@@ -0,0 +1,71 @@
+"""Xchanger request coalescing module"""
+
+import threading
+
+
+class _Flight:
+    """One call in progress and the threads waiting for its outcome."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls made with the same key into one.
+
+    The first thread to call `do` with a key runs the function, the threads
+    calling it with the same key meanwhile wait and get the same result or
+    exception. Once the call returns the key is forgotten, so later calls run
+    the function again.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """
+        Runs fn() unless a call with the same key is in flight, then waits for that one.
+
+        Args:
+            key: A hashable naming the call, for example a currency pair.
+            fn: A callable taking no arguments.
+
+        Returns:
+            The value returned by fn(), in every thread that asked for key meanwhile.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight == None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.calls += 1
+            else:
+                self.shared += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error != None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def in_flight(self):
+        "Returns the number of calls running."
+        with self._lock:
+            return len(self._flights)
@@ -0,0 +1,278 @@
+"""Xchanger shared rate snapshot module"""
+
+import mmap
+import os
+import struct
+import time
+import zlib
+
+from fx._lazy import LazyModule
+from fx.currencies import CURRENCY_INDEX, SUPPORTED_CURRENCIES
+from fx.erros import XchangerException
+from fx.results import RateTable
+
+np = LazyModule("numpy")
+
+MAGIC = b"XCHGSNAP"
+FORMAT_VERSION = 1
+
+# magic, format version, flags, count, sequence, published_at, base, currencies crc32
+HEADER = struct.Struct("<8sHHIQd8sI")
+HEADER_SIZE = 64
+SEQUENCE_OFFSET = 16
+
+FLAG_TO_BASE = 1  # the rates are the value of 1 unit of each currency in the base
+
+_CURRENCIES_CRC = zlib.crc32(",".join(SUPPORTED_CURRENCIES).encode("ascii"))
+
+
+def _file_size(count):
+    "Get the size of a snapshot file of count rates."
+    return HEADER_SIZE + 8 * count
+
+
+class SnapshotWriter:
+    """
+    Publishes rate tables to a fixed-layout memory-mapped file.
+
+    The file is a 64 byte header followed by one float64 unit rate per
+    supported currency, in the order of SUPPORTED_CURRENCIES (NaN where there
+    is no rate). The header holds a sequence number used as a seqlock: it is
+    odd while a table is being written and even once it is complete, so
+    readers never wait on a lock and retry if they saw a write in progress.
+    The file is updated in place and never replaced, so readers that mapped
+    it once keep seeing new tables. Only one writer may publish to a file.
+
+    Parameters
+    ----------
+    path: str
+        The path of the snapshot file, for example on /dev/shm. It is created if it does not exist.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        size = _file_size(len(SUPPORTED_CURRENCIES))
+        try:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if os.fstat(fd).st_size != size:
+                    os.ftruncate(fd, size)
+                self._map = mmap.mmap(fd, size)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            raise XchangerException(f"Fail to open the snapshot {path}. Error : {e}")
+        self._sequence = np.frombuffer(
+            self._map, dtype="<u8", count=1, offset=SEQUENCE_OFFSET
+        )
+        self._rates = np.frombuffer(
+            self._map,
+            dtype="<f8",
+            count=len(SUPPORTED_CURRENCIES),
+            offset=HEADER_SIZE,
+        )
+        magic, _, _, _, _, _, _, crc = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or crc != _CURRENCIES_CRC:
+            self._sequence[0] = 0
+            self._write_header(0.0, b"", 0)
+            self._rates[:] = np.nan
+
+    def _write_header(self, published_at, base, flags):
+        "Write every header field but the sequence number."
+        # struct.pack_into zeroes the region before packing it, which would
+        # show readers an even sequence number in the middle of a write
+        header = HEADER.pack(
+            MAGIC,
+            FORMAT_VERSION,
+            flags,
+            len(SUPPORTED_CURRENCIES),
+            0,
+            published_at,
+            base,
+            _CURRENCIES_CRC,
+        )
+        self._map[:SEQUENCE_OFFSET] = header[:SEQUENCE_OFFSET]
+        self._map[SEQUENCE_OFFSET + 8 : HEADER.size] = header[SEQUENCE_OFFSET + 8 :]
+
+    def write(self, table):
+        """
+        Publishes the unit rates of a RateTable of every supported currency.
+
+        Args:
+            table: A RateTable against one base currency, as made by `Xchanger._making_rate_table`.
+
+        Returns:
+            The new sequence number of the snapshot.
+        """
+        if table.currencies != SUPPORTED_CURRENCIES:
+            raise XchangerException(
+                "A snapshot needs a table of every supported currency."
+            )
+        to_base = table.from_currency == None
+        base = table.to_currency if to_base else table.from_currency
+        rates = table.rates / float(table.amount)
+        sequence = int(self._sequence[0])
+        if sequence % 2:
+            sequence += 1  # a previous writer died in the middle of a write
+        self._sequence[0] = sequence + 1
+        self._rates[:] = rates
+        self._write_header(
+            time.time(),
+            base.encode("ascii"),
+            FLAG_TO_BASE if to_base else 0,
+        )
+        self._sequence[0] = sequence + 2
+        return sequence + 2
+
+    def close(self):
+        "Unmaps the file."
+        self._sequence = self._rates = None
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SnapshotReader:
+    """
+    Reads the rates published by a SnapshotWriter, from any number of processes.
+
+    Lookups read the shared mapping in place (no copy, no lock and no
+    network) and retry while the writer is in the middle of an update.
+
+    Parameters
+    ----------
+    path: str
+        The path of the snapshot file.
+
+    Example
+    -------
+        snapshot = SnapshotReader("/dev/shm/xchanger.snap")
+        snapshot.rate("EUR", "PKR")
+    """
+
+    def __init__(self, path, max_retries=1000):
+        self.path = path
+        self.max_retries = max_retries
+        try:
+            with open(path, "rb") as file:
+                self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise XchangerException(f"Fail to open the snapshot {path}. Error : {e}")
+        magic, version, _, count, _, _, _, crc = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise XchangerException(f"{path} is not an Xchanger snapshot.")
+        if count != len(SUPPORTED_CURRENCIES) or crc != _CURRENCIES_CRC:
+            raise XchangerException(
+                f"{path} was written for another list of supported currencies."
+            )
+        if len(self._map) < _file_size(count):
+            raise XchangerException(f"{path} is truncated.")
+        self._sequence = np.frombuffer(
+            self._map, dtype="<u8", count=1, offset=SEQUENCE_OFFSET
+        )
+        self._rates = np.frombuffer(
+            self._map, dtype="<f8", count=count, offset=HEADER_SIZE
+        )
+
+    def _read(self, read):
+        "Call read() until it ran while no write was in progress, returning its result."
+        for _ in range(self.max_retries):
+            before = int(self._sequence[0])
+            if before % 2 == 0:
+                result = read()
+                if int(self._sequence[0]) == before:
+                    return result
+            time.sleep(0)
+        raise XchangerException(f"The snapshot {self.path} is being written too often.")
+
+    @property
+    def sequence(self):
+        "The sequence number of the published table, 0 if nothing was published yet."
+        return int(self._sequence[0])
+
+    def header(self):
+        "Returns the (sequence, published_at, base, to_base) of the published table."
+
+        def read():
+            _, _, flags, _, sequence, published_at, base, _ = HEADER.unpack_from(
+                self._map, 0
+            )
+            return (
+                sequence,
+                published_at,
+                base.rstrip(b"\0").decode("ascii") or None,
+                bool(flags & FLAG_TO_BASE),
+            )
+
+        return self._read(read)
+
+    def age(self):
+        "Returns the number of seconds since the table was published."
+        return time.time() - self.header()[1]
+
+    def get(self, currency, default=None):
+        "Returns the unit rate of the currency against the base, or default if there is none."
+        index = CURRENCY_INDEX.get(currency)
+        if index == None:
+            return default
+        rate = self._read(lambda: float(self._rates[index]))
+        return default if rate != rate else rate
+
+    def rate(self, from_currency, to_currency):
+        """
+        Returns the value of 1 from_currency in to_currency, crossed through the base.
+
+        Args:
+            from_currency: The currency that the amount is in.
+            to_currency: The currency that the amount is to be converted to.
+
+        Returns:
+            The rate as a float, or None if the snapshot has no rate for one of the currencies.
+        """
+        i = CURRENCY_INDEX.get(from_currency)
+        j = CURRENCY_INDEX.get(to_currency)
+        if i == None or j == None:
+            return None
+
+        def read():
+            flags = HEADER.unpack_from(self._map, 0)[2]
+            return flags, float(self._rates[i]), float(self._rates[j])
+
+        flags, from_rate, to_rate = self._read(read)
+        if flags & FLAG_TO_BASE:
+            from_rate, to_rate = to_rate, from_rate
+        if from_rate != from_rate or to_rate != to_rate or from_rate == 0:
+            return None
+        return to_rate / from_rate
+
+    def view(self):
+        "Returns the rates as a read-only NumPy array backed by the file, which may change under it."
+        return self._rates
+
+    def table(self):
+        "Returns a consistent copy of the published table as a RateTable."
+        header, rates = self._read(
+            lambda: (HEADER.unpack_from(self._map, 0), self._rates.copy())
+        )
+        _, _, flags, _, sequence, _, base, _ = header
+        if sequence == 0:
+            raise XchangerException(f"Nothing was published to {self.path} yet.")
+        base = base.rstrip(b"\0").decode("ascii")
+        if flags & FLAG_TO_BASE:
+            return RateTable(rates, 1, None, base)
+        return RateTable(rates, 1, base, None)
+
+    def close(self):
+        "Unmaps the file."
+        self._sequence = self._rates = None
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
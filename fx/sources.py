@@ -0,0 +1,358 @@
+"""Xchanger rate sources module"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from decimal import Decimal, InvalidOperation
+
+from fx.erros import XchangerException
+from fx.extractors import format_rate
+
+
+class RateSource:
+    """
+    Interface of a place the unit rate of a currency pair is read from.
+
+    Subclass it and implement `fetch`. The rate is returned as text, like the
+    rate shown by xe.com, so Xchanger parses every source the same way.
+    """
+
+    name = "source"
+
+    def fetch(self, from_currency, to_currency, proxies=None):
+        """
+        Returns the rate text of 1 unit of from_currency in to_currency.
+
+        Args:
+            from_currency: The currency that the amount is in.
+            to_currency: The currency that the amount is to be converted to.
+            proxies: The proxies of the request, only used by network sources.
+
+        Returns:
+            The rate text, or None if the source has no rate for the pair.
+        """
+        raise NotImplementedError
+
+
+class XeSource(RateSource):
+    """
+    Scrapes the rate from the xe.com page of the pair, with the session,
+    scheduler and extractor of an Xchanger.
+
+    Parameters
+    ----------
+    xchanger: Xchanger, optional
+        The client the pages are requested with. Defaults to the Xchanger the
+        source is given to.
+
+    name: str, optional
+        The name of the source in the stats. Defaults to "xe.com".
+    """
+
+    def __init__(self, xchanger=None, name="xe.com"):
+        self.xchanger = xchanger
+        self.name = name
+
+    def fetch(self, from_currency, to_currency, proxies=None):
+        "Returns the rate text of the pair scraped from xe.com."
+        return self.xchanger._get_data(from_currency, to_currency, proxies)
+
+
+class FileSource(RateSource):
+    """
+    Reads the rates from a local JSON file, read again whenever it changes.
+
+    The file is either a mapping of unit rates by from and to currency,
+    {"USD": {"EUR": 0.92, "PKR": 278.5}}, or the rates of one base currency as
+    served by `fx.server.RateServer`, {"base": "USD", "amount": 1, "rates": {"EUR": 0.92}},
+    which are divided by the amount and crossed through the base for the other pairs.
+
+    Parameters
+    ----------
+    path: str
+        The path of the JSON file.
+
+    name: str, optional
+        The name of the source in the stats. Defaults to "file".
+    """
+
+    def __init__(self, path, name="file"):
+        self.path = path
+        self.name = name
+        self._mtime = None
+        self._rates = {}
+        self._base = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        "Read the file again if it changed since it was last read."
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return
+            with open(self.path, encoding="utf-8") as file:
+                # keep the numbers as written, so decimal rates are not rounded to floats
+                data = json.load(file, parse_float=str, parse_int=str)
+            if "base" in data and "rates" in data:
+                base, rates = data["base"], {data["base"]: self._unit_rates(data)}
+            else:
+                base, rates = None, data
+        except (OSError, ValueError, InvalidOperation) as e:
+            raise XchangerException(
+                f"Fail to read the rates of {self.path}. Error : {e}"
+            )
+        self._base = base
+        self._rates = rates
+        self._mtime = mtime
+
+    @staticmethod
+    def _unit_rates(data):
+        "Get the unit rates of a base/rates file, dividing out its amount and adding the base itself."
+        amount = Decimal(data.get("amount", "1"))
+        if amount == 0:
+            raise XchangerException("The amount of a rates file can not be 0.")
+        rates = {
+            currency: rate if amount == 1 else format(Decimal(rate) / amount, "f")
+            for currency, rate in data["rates"].items()
+            if rate != None
+        }
+        rates[data["base"]] = "1"
+        return rates
+
+    def fetch(self, from_currency, to_currency, proxies=None):
+        "Returns the rate text of the pair found in the file."
+        with self._lock:
+            self._load()
+            rates, base = self._rates, self._base
+        if from_currency == to_currency:
+            return "1"
+        rate = rates.get(from_currency, {}).get(to_currency)
+        if rate != None or base == None:
+            return rate
+        base_rates = rates[base]
+        from_rate = base_rates.get(from_currency)
+        to_rate = base_rates.get(to_currency)
+        if from_rate == None or to_rate == None or float(from_rate) == 0:
+            return None
+        return format_rate(float(to_rate) / float(from_rate))
+
+
+class LatencyStats:
+    """The latencies of the last `window` successful requests to a source, and its counters."""
+
+    def __init__(self, window=256):
+        self.requests = 0
+        self.failures = 0
+        self.wins = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds, ok):
+        "Records one request that took seconds, and whether it gave a rate."
+        with self._lock:
+            self.requests += 1
+            if ok:
+                self._latencies.append(seconds)
+            else:
+                self.failures += 1
+
+    def win(self):
+        "Records that a request of the source gave the rate that was used."
+        with self._lock:
+            self.wins += 1
+
+    def __len__(self):
+        return len(self._latencies)
+
+    def percentile(self, percent):
+        "Returns the latency under which percent of the recorded requests finished, or None."
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(len(latencies) * percent / 100))
+        return latencies[index]
+
+    def as_dict(self):
+        "Returns the counters and the 50th, 95th and 99th percentiles as a dict."
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "wins": self.wins,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class HedgePolicy:
+    """
+    When a backup request is sent.
+
+    Parameters
+    ----------
+    percentile: float, optional
+        The latency percentile of the primary source after which a backup request
+        is sent. Defaults to 95, so about 5% of the lookups are hedged.
+
+    min_samples: int, optional
+        The number of latencies recorded before the percentile is used. Defaults to 20.
+
+    default_deadline: float, optional
+        The number of seconds waited before a backup request while there are fewer
+        than min_samples latencies. None sends no backup request until then.
+        Defaults to 1.0.
+
+    min_deadline: float, optional
+        The shortest number of seconds waited before a backup request. Defaults to 0.005.
+
+    max_hedges: int, optional
+        The most backup requests sent for one lookup. Defaults to 1.
+
+    window: int, optional
+        The number of latencies kept per source. Defaults to 256.
+    """
+
+    def __init__(
+        self,
+        percentile=95,
+        min_samples=20,
+        default_deadline=1.0,
+        min_deadline=0.005,
+        max_hedges=1,
+        window=256,
+    ):
+        if not 0 < percentile <= 100:
+            raise XchangerException("percentile must be between 0 and 100.")
+        if max_hedges < 0:
+            raise XchangerException("max_hedges must be a positive integer or 0.")
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default_deadline = default_deadline
+        self.min_deadline = min_deadline
+        self.max_hedges = max_hedges
+        self.window = window
+
+    def deadline(self, stats):
+        "Returns the number of seconds to wait for a source with these stats, or None to wait for it."
+        if len(stats) < self.min_samples:
+            return self.default_deadline
+        return max(self.min_deadline, stats.percentile(self.percentile))
+
+
+class HedgedFetcher:
+    """
+    Fetches a pair from the first source and hedges slow or failed requests.
+
+    The request goes to the first source. If it has not answered within the
+    deadline of the HedgePolicy, which comes from the latencies recorded for
+    that source, a backup request goes to the next source (or to the same one
+    if there is only one), and the first rate to arrive is used. A failed
+    request is followed by a backup request right away. The requests that
+    lose keep running in the background and their latencies are recorded too.
+
+    Parameters
+    ----------
+    sources: list
+        The RateSource objects, the primary one first.
+
+    policy: HedgePolicy, optional
+        When backup requests are sent. Defaults to HedgePolicy().
+
+    max_workers: int, optional
+        The number of requests run at once. Defaults to 32.
+
+    instrumentation: Instrumentation, optional
+        Receives the "hedges" counter.
+    """
+
+    def __init__(self, sources, policy=None, max_workers=32, instrumentation=None):
+        if not sources:
+            raise XchangerException("At least one rate source is needed.")
+        self.sources = list(sources)
+        names = [source.name for source in self.sources]
+        if len(set(names)) != len(set(map(id, self.sources))):
+            raise XchangerException("Every rate source needs its own name.")
+        self.policy = policy if policy != None else HedgePolicy()
+        self.stats = {
+            source.name: LatencyStats(self.policy.window) for source in self.sources
+        }
+        self.instrumentation = instrumentation
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="xchanger-source"
+        )
+
+    def _backups(self):
+        "Get the sources the backup requests go to, in order."
+        backups = self.sources[1:] or self.sources[:1]
+        return [backups[i % len(backups)] for i in range(self.policy.max_hedges)]
+
+    def _timed_fetch(self, source, pair, proxies):
+        "Fetch the pair from the source, recording the latency and the outcome."
+        started = time.perf_counter()
+        rate = None
+        try:
+            rate = source.fetch(*pair, proxies=proxies)
+            return rate
+        finally:
+            self.stats[source.name].add(time.perf_counter() - started, rate != None)
+
+    def fetch(self, from_currency, to_currency, proxies=None):
+        """
+        Returns the rate text of the pair and the name of the source it came from.
+
+        Args:
+            from_currency: The currency that the amount is in.
+            to_currency: The currency that the amount is to be converted to.
+            proxies: The proxies of the requests to network sources.
+
+        Returns:
+            A (rate text, source name) tuple.
+        """
+        pair = (from_currency, to_currency)
+        primary = self.sources[0]
+        backups = iter(self._backups())
+        pending = {
+            self._executor.submit(self._timed_fetch, primary, pair, proxies): primary
+        }
+        deadline = self.policy.deadline(self.stats[primary.name])
+        errors = []
+        while pending:
+            done, _ = wait(pending, timeout=deadline, return_when=FIRST_COMPLETED)
+            for future in done:
+                source = pending.pop(future)
+                try:
+                    rate = future.result()
+                except Exception as e:
+                    errors.append(f"{source.name}: {e}")
+                    continue
+                if rate != None:
+                    self.stats[source.name].win()
+                    return rate, source.name
+                errors.append(f"{source.name}: no rate")
+            if done and pending:
+                continue  # a request failed while another one is still running
+            backup = next(backups, None)
+            if backup == None:
+                deadline = None
+                continue
+            if self.instrumentation != None:
+                self.instrumentation.count("hedges")
+            pending[self._executor.submit(self._timed_fetch, backup, pair, proxies)] = (
+                backup
+            )
+            deadline = self.policy.deadline(self.stats[backup.name])
+        raise XchangerException(
+            f"No source has a rate for {from_currency} to {to_currency}. Error : {'; '.join(errors)}"
+        )
+
+    def latency_stats(self):
+        "Returns the stats of every source as a dict."
+        return {name: stats.as_dict() for name, stats in self.stats.items()}
+
+    def close(self):
+        "Stops the request threads once the running requests are done."
+        self._executor.shutdown(wait=False)
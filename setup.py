@@ -6,13 +6,21 @@ with open('DESCRIPTION.txt') as file:
 
 REQUIREMENTS = [
     'requests',
-    'requests_cache',
     'beautifulsoup4',
+    'numpy',
     'pandas',
     'tqdm',
     'termcolor'
     ]
 
+EXTRAS_REQUIREMENTS = {
+    'async': ['aiohttp'],
+    }
+
+ENTRY_POINTS = {
+    'console_scripts': ['xchanger=fx.cli:main'],
+    }
+
 CLASSIFIERS  = [
     'Development Status :: 4 - Beta',
     'Intended Audience :: Developers',
@@ -34,6 +42,8 @@ setup(
     packages=['fx'],
     classifiers=CLASSIFIERS,
     install_requires=REQUIREMENTS,
+    extras_require=EXTRAS_REQUIREMENTS,
+    entry_points=ENTRY_POINTS,
     keywords= 'real-time exchange rates',
     )
 